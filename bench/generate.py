@@ -0,0 +1,111 @@
+"""
+    bench/generate.py
+
+    usage:
+        python bench/generate.py SHAPE COUNT [FILE]
+
+    Notes:
+        Synthetic 'parent|child' trees for the benchmarks, written to FILE or stdout. Every shape
+        is a generator of count lines with unique names, the first line is the root:
+
+            wide:     every node is a child of the root
+            deep:     a single chain, each node is the child of the one before
+            balanced: a complete tree, each node has FANOUT children
+            skewed:   random parents biased towards the oldest nodes, a few huge families
+                      and a long tail of small ones (seeded, so files are repeatable)
+
+        COUNT accepts a K or M suffix, 10K or 10M.
+"""
+
+# Standard library imports
+import sys
+import random
+
+FANOUT = 8
+SEED = 2016
+
+
+def name(i):
+    """ the name of node i """
+    return 'NODE {}'.format(i)
+
+
+def wide_lines(count):
+    yield '|{}\n'.format(name(0))
+    root = name(0)
+    for i in range(1, count):
+        yield '{}|{}\n'.format(root, name(i))
+
+
+def deep_lines(count):
+    yield '|{}\n'.format(name(0))
+    for i in range(1, count):
+        yield '{}|{}\n'.format(name(i - 1), name(i))
+
+
+def balanced_lines(count, fanout=FANOUT):
+    yield '|{}\n'.format(name(0))
+    for i in range(1, count):
+        yield '{}|{}\n'.format(name((i - 1) // fanout), name(i))
+
+
+def skewed_lines(count, seed=SEED):
+    rand = random.Random(seed)
+    yield '|{}\n'.format(name(0))
+    for i in range(1, count):
+        # Cubing a uniform value piles the parents up at the low (old) ids
+        yield '{}|{}\n'.format(name(int(i * rand.random() ** 3)), name(i))
+
+
+SHAPES = {
+    'wide': wide_lines,
+    'deep': deep_lines,
+    'balanced': balanced_lines,
+    'skewed': skewed_lines,
+}
+
+
+def parse_count(text):
+    """
+        return the count for text, which can end in K (thousands) or M (millions)
+    """
+    text = text.strip().upper()
+    if text.endswith('K'):
+        return int(text[:-1]) * 1000
+    if text.endswith('M'):
+        return int(text[:-1]) * 1000000
+    return int(text)
+
+
+def write_shape(shape, count, file_name):
+    """
+        write count lines of shape to file_name
+    """
+    with open(file_name, 'w') as filep:
+        filep.writelines(SHAPES[shape](count))
+
+
+def usage():
+    print ('Usage: %s SHAPE COUNT [FILE]'%sys.argv[0])
+    print ('           SHAPE  One of {}'.format(', '.join(sorted(SHAPES))))
+    print ('           COUNT  Number of nodes, 10K or 10M for thousands or millions')
+    print ('           FILE   Output file, stdout by default')
+    print ('\n')
+    sys.exit(0)
+
+
+def main():
+    """
+        main function for bench/generate.py
+    """
+    if len(sys.argv) not in (3, 4) or sys.argv[1] not in SHAPES:
+        usage()
+    count = parse_count(sys.argv[2])
+    if len(sys.argv) == 4:
+        write_shape(sys.argv[1], count, sys.argv[3])
+    else:
+        sys.stdout.writelines(SHAPES[sys.argv[1]](count))
+
+
+if __name__ == '__main__':
+    main()
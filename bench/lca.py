@@ -0,0 +1,80 @@
+"""
+    bench/lca.py
+
+    usage:
+        python bench/lca.py [SHAPE] [NODES] [PAIRS]
+
+    Notes:
+        Lowest common ancestor benchmark, tree_lca.lca_engine.lca_many against the naive walk up
+        the parent links for every pair. SHAPE is one of the bench/generate.py shapes (skewed by
+        default), the answers of both are checked against each other.
+"""
+
+from __future__ import print_function
+
+# Standard library imports
+import sys
+import os
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tree_data import tree
+from tree_lca import lca_engine
+from generate import SHAPES, parse_count
+
+
+def naive_lca(a, b):
+    """
+        the LCA by walking up the parent links, a's ancestors then b's until one is shared
+    """
+    ancestors = set()
+    while a != None:
+        ancestors.add(a)
+        a = a.parent
+    while b != None and b not in ancestors:
+        b = b.parent
+    return b
+
+
+def main():
+    """
+        main function for bench/lca.py
+    """
+    shape = 'skewed'
+    count = 200000
+    pair_count = 100000
+    if len(sys.argv) > 1:
+        shape = sys.argv[1]
+    if len(sys.argv) > 2:
+        count = parse_count(sys.argv[2])
+    if len(sys.argv) > 3:
+        pair_count = parse_count(sys.argv[3])
+    tree_structure = tree(None)
+    tree_structure.input_stream(SHAPES[shape](count))
+    nodes = list(tree_structure.ordered_nodes())
+    rand = random.Random(count)
+    pairs = [(rand.choice(nodes), rand.choice(nodes)) for i in range(pair_count)]
+    print ('{} {} nodes, depth {}, {} pairs'.format(shape, count, tree_structure.lowest_indent(), pair_count))
+
+    start = time.time()
+    expected = [naive_lca(a, b) for a, b in pairs]
+    naive_seconds = time.time() - start
+
+    start = time.time()
+    engine = lca_engine(tree_structure)
+    build_seconds = time.time() - start
+    start = time.time()
+    found = engine.lca_many(pairs)
+    query_seconds = time.time() - start
+
+    if found != expected:
+        print ('    MISMATCH between lca_many and the naive walk')
+    print ('    {:<16}{:>8.3f} s {:>12,.0f} pairs/s'.format('naive walk', naive_seconds, pair_count / naive_seconds))
+    print ('    {:<16}{:>8.3f} s'.format('engine build', build_seconds))
+    print ('    {:<16}{:>8.3f} s {:>12,.0f} pairs/s'.format('lca_many', query_seconds, pair_count / query_seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+    bench/memory.py
+
+    usage:
+        python bench/memory.py [NODES]
+
+    Notes:
+        Memory benchmark for the node storage in tree_data.py. The same synthetic tree is loaded
+        three ways and the memory held by each is measured with tracemalloc:
+
+            dict node:    the original node class, one __dict__ per node and a copy of the
+                          parent's name on every child
+            slots node:   tree_data.node, __slots__ and shared name strings
+            compact tree: tree_compact.compact_tree, integer ids in typed arrays
+
+        tracemalloc needs Python 3.
+"""
+
+# Standard library imports
+import sys
+import os
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tree_data import tree
+from tree_compact import compact_tree
+from generate import balanced_lines
+
+
+class dict_node():
+    def __init__(self, parent_name, node_name, parent):
+        """
+            The node class as it was before __slots__, kept here for comparison
+        """
+        self.node_name = node_name
+        self.parent_name = parent_name
+        self.parent = parent
+        if parent == None:
+            self.indent = 0
+        else:
+            self.indent = parent.indent + 1
+        self.next = None
+        self.children = []
+
+
+class dict_tree(tree):
+    def insert_node(self, parent_name, node_name, parent):
+        """
+            Link dict_node objects the way the loader did before, names are not shared
+        """
+        new_node = dict_node(parent_name, node_name, parent)
+        if parent != None:
+            parent.children.append(new_node)
+        if self.root == None:
+            self.root = new_node
+        else:
+            self.last.next = new_node
+        self.last = new_node
+        self.name_index.setdefault(node_name, []).append(new_node)
+        self.parent_index.setdefault(parent_name, []).append(new_node)
+        return new_node
+
+    def find_parent(self, text):
+        """ first match, over the plain lists above """
+        nodes = self.name_index.get(text)
+        if nodes:
+            return nodes[0]
+        return None
+
+
+def measure(build, count):
+    """
+        return the bytes still allocated by the structure build() returns
+    """
+    tracemalloc.start()
+    structure = build(count)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del structure
+    return size
+
+
+def build_dict(count):
+    tree_structure = dict_tree(None)
+    tree_structure.input_stream(balanced_lines(count))
+    return tree_structure
+
+
+def build_slots(count):
+    tree_structure = tree(None)
+    tree_structure.input_stream(balanced_lines(count))
+    return tree_structure
+
+
+def build_compact(count):
+    compact = compact_tree()
+    compact.input_stream(balanced_lines(count))
+    return compact
+
+
+def main():
+    """
+        main function for bench/memory.py
+    """
+    count = 200000
+    if len(sys.argv) > 1:
+        count = int(sys.argv[1])
+    print ('{} nodes'.format(count))
+    baseline = None
+    for label, build in (('dict node', build_dict), ('slots node', build_slots), ('compact tree', build_compact)):
+        size = measure(build, count)
+        if baseline == None:
+            baseline = size
+        print ('    {:<14}{:>14,} bytes {:>8.1f} bytes/node {:>6.1%}'.format(label, size, float(size) / count, float(size) / baseline))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+    bench/render.py
+
+    usage:
+        python bench/render.py [NODES]
+
+    Notes:
+        Render throughput benchmark for tree.write_tree in tree_data.py, in lines per second.
+        The tree is written to os.devnull, the per-character indent loop with one print per node
+        that print_tree used before is timed alongside for comparison.
+"""
+
+from __future__ import print_function
+
+# Standard library imports
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tree_data import tree
+from generate import balanced_lines
+
+
+def write_per_node(tree_structure, stream):
+    """
+        the print_tree loop before write_tree, one indent character and one print at a time
+    """
+    node = tree_structure.root
+    while node:
+        ind = ''
+        for x in range(node.indent):
+            ind += '-'
+        print ('{}{}'.format(ind,node.node_name), file=stream)
+        node=node.next
+
+
+def main():
+    """
+        main function for bench/render.py
+    """
+    count = 1000000
+    if len(sys.argv) > 1:
+        count = int(sys.argv[1])
+    tree_structure = tree(None)
+    tree_structure.input_stream(balanced_lines(count))
+    print ('{} nodes, {} levels'.format(count, len(tree_structure.levels)))
+    renderers = (
+        ('per node print', lambda stream: write_per_node(tree_structure, stream)),
+        ('write_tree file order', lambda stream: tree_structure.write_tree(stream)),
+        ('write_tree depth first', lambda stream: tree_structure.write_tree(stream, True)),
+    )
+    with open(os.devnull, 'w') as stream:
+        for label, render in renderers:
+            start = time.time()
+            render(stream)
+            seconds = time.time() - start
+            print ('    {:<24}{:>8.3f} s {:>14,.0f} lines/s'.format(label, seconds, count / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+    bench/server_load.py
+
+    usage:
+        python bench/server_load.py [-h] [-p PORT | -u PATH] [-c CLIENTS] [-n QUERIES] [-b BATCH] [-f FILE]
+
+    Notes:
+        Load test for tree_server.py, which must already be running. CLIENTS threads each open one
+        persistent connection and send QUERIES random F, P and S queries, BATCH at a time through
+        tree_client.pipeline. Names are taken from FILE, the file the server loaded.
+
+        Reports the overall rate, the latency of each batch as the clients saw it, and the
+        server's own per-command latency counters (STATS).
+"""
+
+from __future__ import print_function
+
+# Standard library imports
+import sys
+import os
+import json
+import time
+import random
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tree_data import parse_lines
+from tree_client import tree_client, DEFAULT_PORT
+
+
+def run_client(port, path, names, queries, batch, seed, latencies):
+    """
+        one client thread, appends each batch's seconds to latencies
+    """
+    rand = random.Random(seed)
+    client = tree_client(port, path)
+    for done in range(0, queries, batch):
+        lines = ['{} {}'.format(rand.choice('FPS'), rand.choice(names)) for i in range(min(batch, queries - done))]
+        start = time.time()
+        client.pipeline(lines)
+        latencies.append(time.time() - start)
+    client.close()
+
+
+def percentile(values, fraction):
+    """ the value at fraction (0 to 1) of the sorted values """
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def usage():
+    print ('Usage: %s [-h] [-p PORT | -u PATH] [-c CLIENTS] [-n QUERIES] [-b BATCH] [-f FILE]'%sys.argv[0])
+    print ('           -p PORT     Server port, {} by default'.format(DEFAULT_PORT))
+    print ('           -u PATH     Server Unix socket instead')
+    print ('           -c CLIENTS  Concurrent connections, 8 by default')
+    print ('           -n QUERIES  Queries per client, 10000 by default')
+    print ('           -b BATCH    Queries pipelined per batch, 100 by default')
+    print ('           -f FILE     Data file to take names from, data.txt by default')
+    print ('\n')
+    sys.exit(0)
+
+
+def main():
+    """
+        main function for bench/server_load.py
+    """
+    port = DEFAULT_PORT
+    path = None
+    clients = 8
+    queries = 10000
+    batch = 100
+    filename = 'data.txt'
+    args = sys.argv[1:]
+    while args:
+        arg = args.pop(0)
+        if arg == '-p' and args:
+            port = int(args.pop(0))
+        elif arg == '-u' and args:
+            path = args.pop(0)
+        elif arg == '-c' and args:
+            clients = int(args.pop(0))
+        elif arg == '-n' and args:
+            queries = int(args.pop(0))
+        elif arg == '-b' and args:
+            batch = int(args.pop(0))
+        elif arg == '-f' and args:
+            filename = args.pop(0)
+        else:
+            usage()
+    names = []
+    with open(filename) as filep:
+        for parent_name, node_name in parse_lines(filep, []):
+            names.append(node_name)
+    latencies = []
+    threads = [threading.Thread(target=run_client, args=(port, path, names, queries, batch, seed, latencies)) for seed in range(clients)]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.time() - start
+    latencies.sort()
+    total = clients * queries
+    print ('{} clients x {} queries in batches of {}: {:.3f} s, {:,.0f} queries/s'.format(clients, queries, batch, seconds, total / seconds))
+    print ('    batch latency  p50 {:.4f} s  p99 {:.4f} s  max {:.4f} s'.format(percentile(latencies, .5), percentile(latencies, .99), latencies[-1]))
+    client = tree_client(port, path)
+    print (json.dumps(client.stats(), indent=2, sort_keys=True))
+    client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+    bench/suite.py
+
+    usage:
+        python bench/suite.py [-h] [-s SHAPES] [-n SIZES] [-q QUERIES] [-o FILE]
+
+    Notes:
+        Benchmark suite for tree_data.py. For every shape (bench/generate.py) and size a
+        'parent|child' file is generated in a temporary directory, then these are timed:
+
+            load:         tree.input_tree from the file
+            leaves:       tree.get_leaves
+            lowest:       tree.get_lowest
+            find_node:    QUERIES tree.find_node lookups of random names
+            find_parents: QUERIES tree.find_parents lookups of random names
+            print_tree:   tree.write_tree to os.devnull
+
+        The results are written as JSON (to FILE, or stdout), one record per shape and size with
+        the seconds for each operation, so runs can be compared over time. Rendering a deep
+        chain writes O(n^2) characters, print_tree is skipped (null) for deep trees over
+        DEEP_RENDER_LIMIT nodes.
+
+        SHAPES and SIZES are comma separated, sizes take a K or M suffix, for example
+        python bench/suite.py -s balanced,skewed -n 1K,100K,10M
+"""
+
+# Standard library imports
+import sys
+import os
+import json
+import time
+import random
+import shutil
+import platform
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tree_data import tree
+from generate import SHAPES, parse_count, write_shape, name
+
+DEFAULT_SHAPES = ['wide', 'deep', 'balanced', 'skewed']
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_QUERIES = 1000
+DEEP_RENDER_LIMIT = 20000
+
+
+def timed(function):
+    """
+        run function, return its seconds and its result
+    """
+    start = time.time()
+    result = function()
+    return time.time() - start, result
+
+
+def run_case(shape, count, queries, directory):
+    """
+        generate one shape and size, time every operation and return the record
+    """
+    file_name = os.path.join(directory, '{}_{}.txt'.format(shape, count))
+    write_shape(shape, count, file_name)
+    record = {'shape': shape, 'nodes': count, 'queries': queries}
+    tree_structure = tree(file_name)
+    record['load'], unused = timed(tree_structure.input_tree)
+    record['leaves'], leaves = timed(tree_structure.get_leaves)
+    record['leaf_count'] = len(leaves)
+    record['lowest'], lowest = timed(tree_structure.get_lowest)
+    record['depth'] = tree_structure.lowest_indent()
+    # The same random names for both lookups
+    rand = random.Random(count)
+    names = [name(rand.randrange(count)) for i in range(queries)]
+    record['find_node'], unused = timed(lambda: [tree_structure.find_node(text) for text in names])
+    record['find_parents'], unused = timed(lambda: [tree_structure.find_parents(text) for text in names])
+    if shape == 'deep' and count > DEEP_RENDER_LIMIT:
+        record['print_tree'] = None
+    else:
+        with open(os.devnull, 'w') as stream:
+            record['print_tree'], unused = timed(lambda: tree_structure.write_tree(stream))
+    os.remove(file_name)
+    return record
+
+
+def usage():
+    print ('Usage: %s [-h] [-s SHAPES] [-n SIZES] [-q QUERIES] [-o FILE]'%sys.argv[0])
+    print ('           -h          Show this message, and exit')
+    print ('           -s SHAPES   Comma separated shapes from {}'.format(', '.join(sorted(SHAPES))))
+    print ('           -n SIZES    Comma separated node counts, K and M suffixes allowed')
+    print ('           -q QUERIES  Number of find_node and find_parents lookups per case')
+    print ('           -o FILE     Write the JSON results to FILE instead of stdout')
+    print ('\n')
+    sys.exit(0)
+
+
+def command_line_arguments():
+    """
+        handle command_line_arguments, return shapes, sizes, queries and the output file name
+    """
+    shapes = DEFAULT_SHAPES
+    sizes = DEFAULT_SIZES
+    queries = DEFAULT_QUERIES
+    output = None
+    args = sys.argv[1:]
+    while args:
+        arg = args.pop(0)
+        if arg == '-s' and args:
+            shapes = args.pop(0).split(',')
+        elif arg == '-n' and args:
+            sizes = [parse_count(size) for size in args.pop(0).split(',')]
+        elif arg == '-q' and args:
+            queries = int(args.pop(0))
+        elif arg == '-o' and args:
+            output = args.pop(0)
+        else:
+            usage()
+    for shape in shapes:
+        if shape not in SHAPES:
+            usage()
+    return shapes, sizes, queries, output
+
+
+def main():
+    """
+        main function for bench/suite.py
+    """
+    shapes, sizes, queries, output = command_line_arguments()
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'cases': [],
+    }
+    directory = tempfile.mkdtemp(prefix='tree_bench')
+    try:
+        for shape in shapes:
+            for count in sizes:
+                record = run_case(shape, count, queries, directory)
+                results['cases'].append(record)
+                # Progress on stderr, stdout may be the results
+                sys.stderr.write('{shape:>10} {nodes:>10} load {load:.3f}s leaves {leaves:.3f}s lowest {lowest:.3f}s\n'.format(**record))
+    finally:
+        shutil.rmtree(directory)
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if output:
+        with open(output, 'w') as filep:
+            filep.write(text)
+            filep.write('\n')
+    else:
+        print (text)
+
+
+if __name__ == '__main__':
+    main()
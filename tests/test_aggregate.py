@@ -0,0 +1,85 @@
+"""
+    tests/test_aggregate.py
+
+    Notes:
+        tree_aggregate.aggregate_engine must give the same aggregates with NumPy as with the plain
+        Python loop, for an empty tree, a changed tree and a memory-mapped snapshot. Skipped
+        without NumPy.
+
+            python -m pytest tests
+"""
+
+# Standard library imports
+import sys
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import tree_compact
+import tree_snapshot
+from tree_data import tree
+from tree_aggregate import aggregate_engine, numpy
+
+NAMES = ['N{}'.format(index) for index in range(40)]
+
+
+def random_tree(seed):
+    """ a tree with repeated names, changed by deletes and moves so ids aren't file order """
+    rng = random.Random(seed)
+    tree_structure = tree(None)
+    tree_structure.input_stream(['|TOP'] + ['{}|{}'.format(rng.choice(NAMES + ['TOP', 'Z']), rng.choice(NAMES)) for line in range(400)])
+    for change in range(40):
+        nodes = list(tree_structure.ordered_nodes())
+        if rng.randrange(2):
+            tree_structure.delete_subtree(rng.choice(nodes))
+        else:
+            try:
+                tree_structure.move_subtree(rng.choice(nodes), rng.choice(nodes + [None]))
+            except ValueError:
+                pass
+    return tree_structure
+
+
+@unittest.skipIf(numpy == None, 'NumPy is not installed')
+class aggregate_test(unittest.TestCase):
+    def compare(self, compact):
+        fast = aggregate_engine(compact, use_numpy=True)
+        slow = aggregate_engine(compact, use_numpy=False)
+        self.assertEqual(len(fast), len(slow))
+        for method in ('subtree_sizes', 'leaf_counts', 'depth_histogram', 'leaves', 'lowest'):
+            self.assertEqual(list(getattr(fast, method)()), list(getattr(slow, method)()))
+        values = [(node_id * 7) % 13 for node_id in range(len(slow))]
+        self.assertEqual(list(fast.subtree_sums(numpy.array(values, dtype=numpy.int64))), list(slow.subtree_sums(values)))
+        return fast
+
+    def test_random_trees(self):
+        for seed in range(20):
+            fast = self.compare(tree_compact.from_tree(random_tree(seed)))
+            # The top level subtrees hold every node
+            self.assertEqual(int(fast.subtree_sizes()[fast.depth == 0].sum()), len(fast))
+
+    def test_empty_tree(self):
+        self.compare(tree_compact.compact_tree())
+        self.compare(tree(None))
+
+    def test_mapped_snapshot(self):
+        directory = tempfile.mkdtemp()
+        try:
+            file_name = os.path.join(directory, 'data.snap')
+            tree_snapshot.save(tree_compact.from_tree(random_tree(3)), file_name)
+            compact = tree_snapshot.load(file_name)
+            fast = self.compare(compact)
+            if tree_snapshot.MAPPED:
+                # The arrays are read in place, not copied
+                self.assertTrue(numpy.shares_memory(fast.parent, numpy.frombuffer(compact.parent, dtype=fast.parent.dtype)))
+            del fast, compact
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
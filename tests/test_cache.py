@@ -0,0 +1,99 @@
+"""
+    tests/test_cache.py
+
+    Notes:
+        A tree with a query cache (tree_cache.py) must answer like one without, however it is
+        changed between queries, and a versioned_tree keeps its cache through updates and reloads.
+
+            python -m pytest tests
+"""
+
+# Standard library imports
+import sys
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tree_data import tree
+from tree_concurrent import versioned_tree
+
+NAMES = ['A', 'B', 'C', 'D']
+
+
+def cached_answers(tree_structure):
+    """ the cached queries, names only """
+    result = [[node.node_name for node in tree_structure.get_leaves()],
+              [node.node_name for node in tree_structure.get_lowest()]]
+    for name in NAMES + ['TOP']:
+        result.append([node.node_name for node in tree_structure.find_node(name)])
+        result.append([node.node_name for node in tree_structure.find(name)])
+        result.append([node.node_name for node in tree_structure.find_parents(name)])
+    return result
+
+
+def uncached_answers(tree_structure):
+    cache = tree_structure.cache
+    tree_structure.cache = None
+    try:
+        return cached_answers(tree_structure)
+    finally:
+        tree_structure.cache = cache
+
+
+class cache_test(unittest.TestCase):
+    def test_changes_invalidate(self):
+        rng = random.Random(19)
+        tree_structure = tree(None)
+        tree_structure.input_stream(['|TOP'] + ['{}|{}'.format(rng.choice(NAMES + ['TOP']), rng.choice(NAMES)) for line in range(20)])
+        cache = tree_structure.enable_cache(16)
+        for change in range(300):
+            # Asked twice, the second time from the cache
+            self.assertEqual(cached_answers(tree_structure), uncached_answers(tree_structure))
+            self.assertEqual(cached_answers(tree_structure), uncached_answers(tree_structure))
+            nodes = list(tree_structure.ordered_nodes())
+            choice = rng.randrange(4)
+            if choice == 0 or not nodes:
+                tree_structure.add_node(rng.choice(NAMES + ['TOP']), rng.choice(NAMES))
+            elif choice == 1:
+                tree_structure.delete_subtree(rng.choice(nodes))
+            elif choice == 2:
+                try:
+                    tree_structure.move_subtree(rng.choice(nodes), rng.choice(nodes + [None]))
+                except ValueError:
+                    pass
+            else:
+                tree_structure.rename(rng.choice(nodes), rng.choice(NAMES))
+        self.assertTrue(cache.hits > 0)
+        self.assertTrue(cache.invalidations > 0)
+        self.assertTrue(len(cache.entries) <= 16)
+
+    def test_versioned_update_and_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            file_name = os.path.join(directory, 'data.txt')
+            with open(file_name, 'w') as filep:
+                filep.write('|TOP\nTOP|A\n')
+            tree_structure = tree(None)
+            tree_structure.input_stream(['|TOP', 'TOP|B'])
+            tree_structure.enable_cache(8)
+            shared = versioned_tree(tree_structure)
+            self.assertEqual([node.node_name for node in shared.snapshot().get_leaves()], ['B'])
+            with shared.update() as copy:
+                copy.add_node('B', 'C')
+            self.assertEqual(shared.snapshot().cache.maxsize, 8)
+            self.assertEqual([node.node_name for node in shared.snapshot().get_leaves()], ['C'])
+            shared.load(file_name)
+            self.assertEqual(shared.snapshot().cache.maxsize, 8)
+            self.assertEqual([node.node_name for node in shared.snapshot().get_leaves()], ['A'])
+            self.assertEqual([node.node_name for node in shared.snapshot().get_leaves()], ['A'])
+            self.assertEqual(shared.snapshot().cache.hits, 1)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
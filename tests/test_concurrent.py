@@ -0,0 +1,114 @@
+"""
+    tests/test_concurrent.py
+
+    Notes:
+        tree_concurrent.copy_tree must give a copy that answers every query like the original, so
+        what versioned_tree.update() writes doesn't depend on how writes are batched.
+
+            python -m pytest tests
+"""
+
+# Standard library imports
+import sys
+import os
+import random
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tree_data import tree
+from tree_concurrent import copy_tree, versioned_tree
+
+NAMES = ['A', 'B', 'C', 'D', 'E', 'F']
+
+
+def random_tree(seed):
+    """ a small tree with repeated names, changed by random adds, deletes, moves and renames """
+    rng = random.Random(seed)
+    tree_structure = tree(None)
+    tree_structure.input_stream(['|TOP'] + ['{}|{}'.format(rng.choice(NAMES + ['TOP', 'Z']), rng.choice(NAMES)) for line in range(12)])
+    for change in range(10):
+        nodes = list(tree_structure.ordered_nodes())
+        if not nodes:
+            break
+        choice = rng.randrange(4)
+        if choice == 0:
+            tree_structure.add_node(rng.choice(NAMES + ['TOP']), rng.choice(NAMES))
+        elif choice == 1:
+            tree_structure.delete_subtree(rng.choice(nodes))
+        elif choice == 2:
+            try:
+                tree_structure.move_subtree(rng.choice(nodes), rng.choice(nodes + [None]))
+            except ValueError:
+                pass
+        else:
+            tree_structure.rename(rng.choice(nodes), rng.choice(NAMES))
+    return tree_structure
+
+
+def answers(tree_structure):
+    """ every query answer, each node given as its position in file order """
+    position = dict((node, index) for index, node in enumerate(tree_structure.ordered_nodes()))
+
+    def positions(nodes):
+        return [position[node] for node in nodes]
+    result = {
+        'file': [(node.parent_name, node.node_name, node.indent) for node in tree_structure.ordered_nodes()],
+        'preorder': positions(tree_structure.preorder()),
+        'leaves': positions(tree_structure.get_leaves()),
+        'lowest': positions(tree_structure.get_lowest()),
+        'sizes': tree_structure.level_sizes(),
+    }
+    for indent in range(len(tree_structure.levels)):
+        result['level', indent] = positions(tree_structure.get_level(indent))
+    for name in NAMES + ['TOP', 'Z']:
+        result['find', name] = positions(tree_structure.find_node(name))
+        result['parents', name] = positions(tree_structure.find_parents(name))
+        parent = tree_structure.find_parent(name)
+        result['parent', name] = parent and position[parent]
+    return result
+
+
+class copy_test(unittest.TestCase):
+    def test_copy_answers_like_original(self):
+        for seed in range(300):
+            original = random_tree(seed)
+            copy = copy_tree(original)
+            self.assertEqual(answers(copy), answers(original))
+            self.assertEqual(copy.version, original.version)
+            # And keeps doing so through the same name based changes
+            for tree_structure in (original, copy):
+                tree_structure.add_node('A', 'NEW')
+                if tree_structure.find_parent('B') != None:
+                    tree_structure.rename(tree_structure.find_parent('B'), 'A')
+                tree_structure.add_node('A', 'LATER')
+            self.assertEqual(answers(copy), answers(original))
+
+    def test_copy_is_independent(self):
+        original = random_tree(1)
+        before = answers(original)
+        copy = copy_tree(original)
+        copy.add_node('TOP', 'ONLY IN COPY')
+        copy.delete_subtree(copy.root)
+        self.assertEqual(answers(original), before)
+
+    def test_batching(self):
+        def build():
+            tree_structure = tree(None)
+            tree_structure.input_stream(['|R', 'R|A', 'R|B', 'B|kid'])
+            return versioned_tree(tree_structure)
+        batched = build()
+        with batched.update() as tree_structure:
+            tree_structure.rename(tree_structure.find_parent('A'), 'B')
+            tree_structure.add_node('B', 'new')
+        separate = build()
+        with separate.update() as tree_structure:
+            tree_structure.rename(tree_structure.find_parent('A'), 'B')
+        with separate.update() as tree_structure:
+            tree_structure.add_node('B', 'new')
+        self.assertEqual(answers(separate.snapshot()), answers(batched.snapshot()))
+        self.assertEqual((batched.generation, separate.generation), (1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+    tests/test_heap_store.py
+
+    Notes:
+        The filled and free slot index of tree/tree.py's heapStore must match its slots after
+        every set, clear and bulk fill, and its queries must answer as a scan of the slots would.
+
+            python -m pytest tests
+"""
+
+# Standard library imports
+import sys
+import os
+import random
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tree'))
+
+from tree import heapStore
+
+
+class heap_store_test(unittest.TestCase):
+    def check(self, store):
+        slots = store.slots
+        filled = {}
+        free = {}
+        for index in sorted(slots):
+            filled.setdefault(index.bit_length(), []).append(index)
+        # A free slot is empty with its parent filled, the root's is always there
+        candidates = set([1])
+        for index in slots:
+            candidates.update((2 * index, 2 * index + 1))
+        for index in sorted(candidates):
+            if index not in slots and (index == 1 or index // 2 in slots):
+                free.setdefault(index.bit_length(), []).append(index)
+        self.assertEqual(store.filled, filled)
+        self.assertEqual(dict((level, sorted(indexes)) for level, indexes in store.free.items()), free)
+        self.assertEqual(set(store.free_order), set(free))
+        for level, order in store.free_order.items():
+            self.assertTrue(set(order) >= store.free[level])
+            self.assertTrue(len(order) <= 2 * len(store.free[level]) + 16)
+            for position in range(1, len(order)):
+                self.assertTrue(order[(position - 1) // 2] <= order[position])
+        for level in range(1, max(free) + 2):
+            self.assertEqual(list(store.filledSlots(level)), filled.get(level, []))
+            self.assertEqual(store.filledCount(level), len(filled.get(level, [])))
+            self.assertEqual(list(store.freeSlots(level)), free.get(level, []))
+            self.assertEqual(store.firstFree(level), (free.get(level) or [None])[0])
+            self.assertEqual(list(store.openParents(level)), [index for index in filled.get(level, []) if 2 * index not in slots or 2 * index + 1 not in slots])
+        self.assertEqual(store.nextFree(), min(min(indexes) for indexes in free.values()))
+        self.assertTrue(max(list(slots) + [0]) < len(store))
+
+    def test_set_and_clear(self):
+        rng = random.Random(23)
+        for trial in range(40):
+            store = heapStore(rng.randrange(4))
+            self.check(store)
+            for change in range(300):
+                choice = rng.randrange(4)
+                if choice == 0 and store.slots:
+                    # Clear any filled slot, its subtree may be left without it
+                    store[rng.choice(list(store.slots))] = -999
+                elif choice == 1:
+                    store[rng.randrange(1, 64)] = rng.randrange(100)
+                elif choice == 2:
+                    store[rng.randrange(1, 64)] = -999
+                else:
+                    store[store.nextFree()] = rng.randrange(100)
+                self.check(store)
+
+    def test_fill(self):
+        rng = random.Random(5)
+        for trial in range(40):
+            slots = {}
+            for index in range(1, 512):
+                if (index == 1 or index // 2 in slots) and rng.random() < 0.8:
+                    slots[index] = index
+            store = heapStore(0, slots)
+            self.check(store)
+            for index in list(slots)[:20]:
+                store[index] = -999
+                self.check(store)
+
+    def test_fill_level_order(self):
+        store = heapStore()
+        for count in range(1, 2000):
+            self.assertEqual(store.nextFree(), count)
+            store[count] = count
+        self.check(store)
+        self.assertEqual(store.firstFree(11), 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+"""
+    tests/test_journal.py
+
+    Notes:
+        Journal replay and compaction (tree_journal.py): a compacted base file must load back as
+        the tree the journal described, and a stale journal must never swallow new records.
+
+            python -m pytest tests
+"""
+
+# Standard library imports
+import sys
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import tree_journal
+from tree_data import load_tree
+
+
+def shape(tree_structure):
+    """ the tree as (node_name, indent) pairs, depth first, siblings in order """
+    return [(node.node_name, node.indent) for node in tree_structure.preorder()]
+
+
+def file_order(tree_structure):
+    """ the nodes as (parent_name, node_name, indent) in file order """
+    return [(node.parent_name, node.node_name, node.indent) for node in tree_structure.ordered_nodes()]
+
+
+class journal_test(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, 'data.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_base(self, lines):
+        with open(self.file_name, 'w') as filep:
+            filep.write(''.join(line + '\n' for line in lines))
+
+    def read_base(self):
+        with open(self.file_name) as filep:
+            return filep.read()
+
+    def open_journal(self):
+        tree_structure = tree_journal.load_tree(self.file_name)
+        return tree_structure, tree_journal.journal(tree_structure, sync=False)
+
+    def test_compact_round_trip(self):
+        random.seed(12)
+        names = ['A', 'B', 'C', 'D', 'E']
+        for trial in range(200):
+            self.write_base(['|TOP'] + ['{}|{}'.format(random.choice(names + ['TOP', 'Z']), random.choice(names)) for line in range(8)])
+            tree_structure, changes = self.open_journal()
+            for change in range(6):
+                choice = random.randrange(4)
+                try:
+                    if choice == 0:
+                        changes.add(random.choice(names + ['TOP']), random.choice(names + ['Z']))
+                    elif choice == 1:
+                        changes.delete(random.choice(names))
+                    elif choice == 2:
+                        changes.move(random.choice(names), random.choice(names + ['TOP']))
+                    else:
+                        changes.rename(random.choice(names + ['TOP']), random.choice(names + ['Z']))
+                except (KeyError, ValueError):
+                    pass
+            changes.close()
+            expected = shape(tree_structure)
+            # The journal alone gives the same tree
+            self.assertEqual(shape(tree_journal.load_tree(self.file_name)), expected)
+            base = self.read_base()
+            snapshot = trial % 2 == 0
+            try:
+                changes.compact(snapshot)
+            except ValueError:
+                # Refused, nothing was touched
+                self.assertEqual(self.read_base(), base)
+                self.assertEqual(shape(tree_journal.load_tree(self.file_name)), expected)
+                continue
+            self.assertFalse(os.path.exists(changes.journal_file))
+            self.assertEqual(shape(load_tree(self.file_name)), expected)
+            if snapshot:
+                # The snapshot loads as the new data file does, file order included
+                self.assertEqual(file_order(load_tree(self.file_name, True)), file_order(load_tree(self.file_name)))
+
+    def test_rename_onto_parent_name(self):
+        self.write_base(['|TOP', 'TOP|A', 'TOP|B', 'B|c'])
+        tree_structure, changes = self.open_journal()
+        changes.rename('B', 'A')
+        expected = shape(tree_structure)
+        base = self.read_base()
+        # The A with c comes second under TOP but is the one c resolves to, no plain lines for that
+        self.assertRaises(ValueError, changes.compact)
+        self.assertEqual(self.read_base(), base)
+        self.assertTrue(os.path.exists(changes.journal_file))
+        self.assertEqual(shape(tree_journal.load_tree(self.file_name)), expected)
+
+    def test_rename_onto_unresolved_parent_name(self):
+        self.write_base(['|TOP', 'TOP|X', 'Z|n'])
+        tree_structure, changes = self.open_journal()
+        changes.rename('X', 'Z')
+        expected = shape(tree_structure)
+        changes.compact()
+        self.assertEqual(shape(load_tree(self.file_name)), expected)
+
+    def test_stale_journal(self):
+        self.write_base(['|TOP', 'TOP|A'])
+        tree_structure, changes = self.open_journal()
+        changes.add('TOP', 'B')
+        changes.close()
+        journal_file = changes.journal_file
+        with open(journal_file) as filep:
+            stale = filep.read()
+        # Crash between renaming the compacted base into place and removing the journal
+        changes.compact()
+        with open(journal_file, 'w') as filep:
+            filep.write(stale)
+        tree_structure, changes = self.open_journal()
+        self.assertEqual(shape(tree_structure), [('TOP', 0), ('A', 1), ('B', 1)])
+        self.assertFalse(os.path.exists(journal_file))
+        changes.add('TOP', 'C')
+        changes.close()
+        self.assertEqual(shape(tree_journal.load_tree(self.file_name)), [('TOP', 0), ('A', 1), ('B', 1), ('C', 1)])
+
+    def test_stale_journal_on_append(self):
+        self.write_base(['|TOP'])
+        with open(tree_journal.journal_name(self.file_name), 'w') as filep:
+            filep.write('B|0|0\nA|TOP|OLD\n')
+        # Loaded without replaying, the first append still starts a fresh journal
+        changes = tree_journal.journal(load_tree(self.file_name), sync=False)
+        changes.add('TOP', 'NEW')
+        changes.close()
+        self.assertEqual(shape(tree_journal.load_tree(self.file_name)), [('TOP', 0), ('NEW', 1)])
+        self.assertTrue(os.path.exists(tree_journal.stale_name(changes.journal_file)))
+
+    def test_bad_names(self):
+        self.write_base(['|TOP', 'TOP|A'])
+        tree_structure, changes = self.open_journal()
+        for name in ('a|b', 'a\nb', 'a\rb'):
+            self.assertRaises(ValueError, changes.add, 'TOP', name)
+            self.assertRaises(ValueError, changes.rename, 'A', name)
+        self.assertRaises(ValueError, changes.add, 'a|b', 'C')
+        self.assertRaises(ValueError, changes.move, 'A', 'a|b')
+        changes.close()
+        self.assertEqual(shape(tree_structure), [('TOP', 0), ('A', 1)])
+        self.assertEqual(shape(tree_journal.load_tree(self.file_name)), [('TOP', 0), ('A', 1)])
+        self.assertEqual(tree_structure.errors, [])
+
+    def test_move_missing_parent(self):
+        self.write_base(['|TOP', 'TOP|A', 'A|B'])
+        tree_structure, changes = self.open_journal()
+        self.assertRaises(KeyError, changes.move, 'A', 'TOPP')
+        self.assertEqual(shape(tree_structure), [('TOP', 0), ('A', 1), ('B', 2)])
+        # '' is the top level
+        changes.move('B', '')
+        changes.close()
+        expected = [('TOP', 0), ('A', 1), ('B', 0)]
+        self.assertEqual(shape(tree_structure), expected)
+        self.assertEqual(shape(tree_journal.load_tree(self.file_name)), expected)
+
+    def test_replay_move_missing_parent(self):
+        self.write_base(['|TOP', 'TOP|A'])
+        with open(tree_journal.journal_name(self.file_name), 'w') as filep:
+            filep.write('B|{}\nM|A|TOPP\n'.format(tree_journal.base_stamp(self.file_name)))
+        tree_structure = tree_journal.load_tree(self.file_name)
+        self.assertEqual(shape(tree_structure), [('TOP', 0), ('A', 1)])
+        self.assertEqual(len(tree_structure.errors), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+    tests/test_lca.py
+
+    Notes:
+        tree_lca.lca_engine must answer lca, lca_many, distance and distance_many as a walk up the
+        parent links does, and keep doing so as the tree is changed under it.
+
+            python -m pytest tests
+"""
+
+# Standard library imports
+import sys
+import os
+import random
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tree_data import tree
+from tree_lca import lca_engine, path
+
+NAMES = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H']
+
+
+def naive_lca(a, b):
+    """ the lowest common ancestor found by walking up the parent links """
+    ancestors = set()
+    node = a
+    while node != None:
+        ancestors.add(node)
+        node = node.parent
+    node = b
+    while node != None and node not in ancestors:
+        node = node.parent
+    return node
+
+
+def naive_distance(a, b):
+    ancestor = naive_lca(a, b)
+    if ancestor == None:
+        return None
+    return a.indent + b.indent - 2 * ancestor.indent
+
+
+class lca_test(unittest.TestCase):
+    def check(self, engine, tree_structure, rng):
+        nodes = list(tree_structure.ordered_nodes())
+        if not nodes:
+            return
+        pairs = [(rng.choice(nodes), rng.choice(nodes)) for pair in range(200)]
+        for a, b in pairs:
+            self.assertTrue(engine.lca(a, b) is naive_lca(a, b))
+            self.assertEqual(engine.distance(a, b), naive_distance(a, b))
+        self.assertEqual(engine.lca_many(pairs), [naive_lca(a, b) for a, b in pairs])
+        self.assertEqual(engine.distance_many(pairs), [naive_distance(a, b) for a, b in pairs])
+        for node in nodes[:20]:
+            nodes_on_path = path(node)
+            self.assertTrue(nodes_on_path[-1] is node)
+            self.assertTrue(nodes_on_path[0].parent == None)
+            self.assertEqual(len(nodes_on_path), node.indent + 1)
+
+    def test_random_changes(self):
+        rng = random.Random(14)
+        for trial in range(20):
+            tree_structure = tree(None)
+            # Deep chains as well as wide levels, and parents that are never found
+            tree_structure.input_stream(['|TOP'] + ['{}|{}'.format(rng.choice(NAMES + ['TOP', 'Z']), rng.choice(NAMES)) for line in range(150)])
+            engine = lca_engine(tree_structure)
+            self.check(engine, tree_structure, rng)
+            for change in range(15):
+                nodes = list(tree_structure.ordered_nodes())
+                if not nodes:
+                    break
+                if rng.randrange(3):
+                    try:
+                        tree_structure.move_subtree(rng.choice(nodes), rng.choice(nodes + [None]))
+                    except ValueError:
+                        pass
+                else:
+                    tree_structure.delete_subtree(rng.choice(nodes))
+                self.check(engine, tree_structure, rng)
+
+    def test_chain(self):
+        tree_structure = tree(None)
+        tree_structure.input_stream(['|N0'] + ['N{}|N{}'.format(index, index + 1) for index in range(300)])
+        engine = lca_engine(tree_structure)
+        nodes = list(tree_structure.ordered_nodes())
+        self.assertTrue(engine.lca(nodes[300], nodes[17]) is nodes[17])
+        self.assertEqual(engine.distance(nodes[300], nodes[17]), 283)
+        self.check(engine, tree_structure, random.Random(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
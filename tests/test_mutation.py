@@ -0,0 +1,133 @@
+"""
+    tests/test_mutation.py
+
+    Notes:
+        Invariants of the tree in tree_data.py through random adds, deletes, moves and renames:
+        the next chain, parent and children links, indents, the name and parent_name indexes and
+        the levels lists must all describe the same tree after every change.
+
+            python -m pytest tests
+"""
+
+# Standard library imports
+import sys
+import os
+import random
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tree_data import tree, live_nodes
+
+NAMES = ['A', 'B', 'C', 'D', 'E', 'F', 'G']
+
+
+def check_list(test, nodes, slot):
+    """ a node_list: every live node knows its place and the holes are under half of it """
+    test.assertTrue(len(nodes) > 0)
+    test.assertTrue(nodes.holes * 2 <= len(nodes))
+    test.assertEqual(nodes.holes, len([node for node in nodes if node == None]))
+    for position in range(len(nodes)):
+        if nodes[position] != None:
+            test.assertEqual(getattr(nodes[position], slot), position)
+    test.assertTrue(nodes.first() is [node for node in nodes if node != None][0])
+
+
+class mutation_test(unittest.TestCase):
+    def check(self, tree_structure, deleted):
+        chain = []
+        node = tree_structure.root
+        previous = None
+        while node:
+            self.assertTrue(node.prev is previous)
+            chain.append(node)
+            previous = node
+            node = node.next
+        self.assertTrue(tree_structure.last is previous)
+        self.assertEqual(len(set(chain)), len(chain))
+        self.assertFalse(set(chain) & deleted)
+        named = {}
+        parented = {}
+        for node in chain:
+            named.setdefault(node.node_name, set()).add(node)
+            parented.setdefault(node.parent_name, set()).add(node)
+            if node.parent == None:
+                self.assertEqual(node.indent, 0)
+            else:
+                self.assertTrue(node.parent in set(chain))
+                self.assertEqual(node.indent, node.parent.indent + 1)
+                self.assertEqual(node.parent_name, node.parent.node_name)
+                self.assertEqual(len([child for child in live_nodes(node.parent.children) if child is node]), 1)
+            if node.children:
+                check_list(self, node.children, 'child_position')
+                for child in node.children.live():
+                    self.assertTrue(child.parent is node)
+        for index, expected, slot in ((tree_structure.name_index, named, 'name_position'), (tree_structure.parent_index, parented, 'parent_position')):
+            self.assertEqual(set(index), set(expected))
+            for name, nodes in index.items():
+                check_list(self, nodes, slot)
+                self.assertEqual(set(nodes.live()), expected[name])
+                self.assertEqual(len(list(nodes.live())), len(expected[name]))
+        sizes = tree_structure.level_sizes()
+        self.assertEqual(sum(sizes), len(chain))
+        self.assertEqual(len(sizes), len(tree_structure.levels))
+        for indent in range(len(sizes)):
+            check_list(self, tree_structure.levels[indent], 'level_position')
+            self.assertEqual(set(tree_structure.get_level(indent)), set(node for node in chain if node.indent == indent))
+            self.assertEqual(len(tree_structure.get_level(indent)), sizes[indent])
+        self.assertEqual(set(tree_structure.preorder()), set(chain))
+
+    def test_random_changes(self):
+        rng = random.Random(7)
+        for trial in range(60):
+            tree_structure = tree(None)
+            tree_structure.input_stream(['|TOP'] + ['{}|{}'.format(rng.choice(NAMES + ['TOP', 'Z']), rng.choice(NAMES)) for line in range(30)])
+            deleted = set()
+            self.check(tree_structure, deleted)
+            for change in range(40):
+                nodes = list(tree_structure.ordered_nodes())
+                choice = rng.randrange(5)
+                if choice == 0 or not nodes:
+                    tree_structure.add_node(rng.choice(NAMES + ['TOP']), rng.choice(NAMES))
+                elif choice == 1:
+                    deleted.update(tree_structure.delete_subtree(rng.choice(nodes)))
+                elif choice == 2:
+                    try:
+                        tree_structure.move_subtree(rng.choice(nodes), rng.choice(nodes + [None]))
+                    except ValueError:
+                        pass
+                elif choice == 3:
+                    tree_structure.rename(rng.choice(nodes), rng.choice(NAMES))
+                else:
+                    tree_structure.add_child(rng.choice(nodes + [None]), rng.choice(NAMES))
+                self.check(tree_structure, deleted)
+
+    def test_move_cycle(self):
+        tree_structure = tree(None)
+        tree_structure.input_stream(['|TOP', 'TOP|A', 'A|B'])
+        self.assertRaises(ValueError, tree_structure.move_subtree, tree_structure.find_parent('A'), tree_structure.find_parent('B'))
+        self.check(tree_structure, set())
+
+    def test_delete_leaves_lists_in_place(self):
+        width = 1000
+        tree_structure = tree(None)
+        tree_structure.input_stream(['|TOP'] + ['TOP|N'] * width)
+        top = tree_structure.root
+        lists = [top.children, tree_structure.name_index['N'], tree_structure.parent_index['TOP'], tree_structure.levels[1]]
+        leaves = tree_structure.find_node('N')
+        for count in range(1, width // 2 + 1):
+            tree_structure.delete_subtree(leaves[count - 1])
+            self.assertEqual(tree_structure.lowest_indent(), 1)
+            # Each list only gained a hole, nothing was rebuilt or rescanned
+            for nodes in lists:
+                self.assertEqual((len(nodes), nodes.holes), (width, count))
+        self.assertEqual(tree_structure.level_sizes(), [1, width // 2])
+        # One more and the holes are squeezed out, once
+        tree_structure.delete_subtree(leaves[width // 2])
+        for nodes in lists:
+            self.assertEqual((len(nodes), nodes.holes), (width // 2 - 1, 0))
+        self.check(tree_structure, set(leaves[:width // 2 + 1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
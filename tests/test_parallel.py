@@ -0,0 +1,72 @@
+"""
+    tests/test_parallel.py
+
+    Notes:
+        tree_parallel.load_parallel must build the compact_tree the sequential loader builds, for
+        split plain files as well as stdin and .gz files.
+
+            python -m pytest tests
+"""
+
+# Standard library imports
+import sys
+import os
+import io
+import gzip
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import tree_parallel
+from tree_compact import compact_tree
+
+LINES = ['|TOP', 'TOP|A', 'no separator', 'A|B', '', 'TOP|C', 'B|D', 'C|A', 'A|E']
+
+
+def contents(compact):
+    return (list(compact.names), list(compact.node_name), list(compact.parent_name), list(compact.parent),
+            list(compact.depth), list(compact.first), compact.errors)
+
+
+class parallel_test(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, 'data.txt')
+        text = ''.join(line + '\n' for line in LINES * 200)
+        with open(self.file_name, 'w') as filep:
+            filep.write(text)
+        with gzip.open(self.file_name + '.gz', 'wb') as filep:
+            filep.write(text.encode('utf-8'))
+        self.expected = compact_tree()
+        self.expected.input_tree(self.file_name)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_split(self):
+        minimum = tree_parallel.MIN_PARALLEL_SIZE
+        tree_parallel.MIN_PARALLEL_SIZE = 0
+        try:
+            compact = tree_parallel.load_parallel(self.file_name, 2)
+        finally:
+            tree_parallel.MIN_PARALLEL_SIZE = minimum
+        self.assertEqual(contents(compact), contents(self.expected))
+
+    def test_gzip(self):
+        self.assertEqual(contents(tree_parallel.load_parallel(self.file_name + '.gz', 2)), contents(self.expected))
+
+    def test_stdin(self):
+        stdin = sys.stdin
+        with io.open(self.file_name) as filep:
+            sys.stdin = filep
+            try:
+                compact = tree_parallel.load_parallel('-', 2)
+            finally:
+                sys.stdin = stdin
+        self.assertEqual(contents(compact), contents(self.expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+    tests/test_search.py
+
+    Notes:
+        tree_search.name_search answers against a scan of every name, short texts included.
+
+            python -m pytest tests
+"""
+
+# Standard library imports
+import sys
+import os
+import random
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tree_data import tree
+
+
+def distance(first, second):
+    """ edit distance, one row at a time """
+    row = list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        previous = row
+        row = [i]
+        for j in range(1, len(second) + 1):
+            row.append(min(previous[j] + 1, row[j - 1] + 1, previous[j - 1] + (first[i - 1] != second[j - 1])))
+    return row[-1]
+
+
+class search_test(unittest.TestCase):
+    def test_against_scan(self):
+        rng = random.Random(4)
+        names = set()
+        while len(names) < 300:
+            names.add(''.join(rng.choice('abcAB ') for i in range(rng.randrange(1, 8))))
+        names = sorted(names)
+        tree_structure = tree(None)
+        tree_structure.input_stream(['|TOP'] + ['TOP|{}'.format(name) for name in names])
+        # Names are stripped as lines are read
+        names = sorted(set(name.strip() for name in names) | set(['TOP']))
+        searcher = tree_structure.name_search()
+        for text in ['', 'a', 'B', ' ', 'ab', 'bA', 'abc', 'cab', 'abca', 'zz', 'aaaa b']:
+            self.assertEqual(sorted(searcher.prefix(text)), [name for name in names if name.lower().startswith(text.lower())])
+            self.assertEqual(sorted(searcher.substring(text)), [name for name in names if text.lower() in name.lower()])
+            for max_distance in (0, 1, 2):
+                self.assertEqual(sorted(searcher.fuzzy(text, max_distance)), [name for name in names if distance(name.lower(), text.lower()) <= max_distance])
+            self.assertEqual(len(searcher.substring(text, 5)), min(5, len(searcher.substring(text))))
+            found = searcher.search(text, limit=10)
+            self.assertEqual(len(found), len(set(found)))
+            self.assertTrue(len(found) <= 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
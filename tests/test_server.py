@@ -0,0 +1,73 @@
+"""
+    tests/test_server.py
+
+    Notes:
+        tree_server.py answers every request line once and in order, bad lines included, so a
+        pipelining client never loses its place. asyncio needs Python 3, skipped on Python 2.
+
+            python -m pytest tests
+"""
+
+# Standard library imports
+import sys
+import os
+import json
+import socket
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tree_data import tree
+from tree_concurrent import versioned_tree
+
+
+@unittest.skipIf(sys.version_info[0] < 3, 'asyncio needs Python 3')
+class server_test(unittest.TestCase):
+    def exchange(self, request):
+        """ send request bytes to a server on its own event loop thread, return its answers """
+        import asyncio
+        import tree_server
+        tree_structure = tree(None)
+        tree_structure.input_stream(['|TOP', 'TOP|A', 'A|B'])
+        server = tree_server.tree_server(versioned_tree(tree_structure, intervals=True))
+        loop = asyncio.new_event_loop()
+        listener = loop.run_until_complete(asyncio.start_server(server.handle, '127.0.0.1', 0, limit=tree_server.REQUEST_LIMIT))
+        thread = threading.Thread(target=loop.run_forever)
+        thread.start()
+        try:
+            sock = socket.create_connection(listener.sockets[0].getsockname()[:2])
+            sock.sendall(request)
+            sock.shutdown(socket.SHUT_WR)
+            with sock.makefile('rb') as reader:
+                answers = [json.loads(line.decode('utf-8')) for line in reader]
+            sock.close()
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            listener.close()
+            loop.run_until_complete(listener.wait_closed())
+            loop.close()
+        return answers
+
+    def test_bad_lines_answered(self):
+        long_line = b'F ' + b'x' * (3 * 2**16) + b'\n'
+        answers = self.exchange(b'F A\n' + long_line + b'F \xff\xfe\n' + b'\n' + b'F B\n' + long_line + b'F A')
+        self.assertEqual(len(answers), 7)
+        self.assertEqual([node['node'] for node in answers[0]['nodes']], ['A'])
+        self.assertTrue('over' in answers[1]['error'])
+        self.assertTrue('UTF-8' in answers[2]['error'])
+        self.assertEqual(answers[3]['error'], 'empty request')
+        self.assertEqual([node['node'] for node in answers[4]['nodes']], ['B'])
+        self.assertTrue('over' in answers[5]['error'])
+        # The last line, without its line break
+        self.assertEqual([node['node'] for node in answers[6]['nodes']], ['A'])
+
+    def test_stats(self):
+        answers = self.exchange(b'F A\nSTATS\n')
+        self.assertEqual(answers[1]['generation'], 0)
+        self.assertEqual(answers[1]['stats']['F']['count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
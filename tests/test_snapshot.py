@@ -0,0 +1,68 @@
+"""
+    tests/test_snapshot.py
+
+    Notes:
+        A tree loaded through its binary snapshot (tree_snapshot.py) must match the parsed text,
+        malformed line errors included, whether the arrays are mapped or copied.
+
+            python -m pytest tests
+"""
+
+# Standard library imports
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import tree_snapshot
+from tree_data import load_tree
+
+LINES = ['|TOP', 'TOP|A', 'bad line', 'A|B', 'TOP|C', 'C|D', 'last bad line']
+
+
+def contents(tree_structure):
+    return [(node.parent_name, node.node_name, node.indent) for node in tree_structure.ordered_nodes()], tree_structure.errors
+
+
+class snapshot_test(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, 'data.txt')
+        with open(self.file_name, 'wb') as filep:
+            filep.write(''.join(line + '\n' for line in LINES).encode('utf-8'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def check_loads(self):
+        expected = contents(load_tree(self.file_name))
+        self.assertEqual(len(expected[1]), 2)
+        # First load writes the snapshot, the second reads it
+        self.assertEqual(contents(load_tree(self.file_name, True)), expected)
+        self.assertTrue(os.path.exists(tree_snapshot.snapshot_name(self.file_name)))
+        self.assertEqual(contents(load_tree(self.file_name, True)), expected)
+
+    def test_errors_kept(self):
+        self.check_loads()
+
+    def test_copied_arrays(self):
+        mapped = tree_snapshot.MAPPED
+        tree_snapshot.MAPPED = False
+        try:
+            self.check_loads()
+        finally:
+            tree_snapshot.MAPPED = mapped
+
+    def test_unreadable_snapshot_rebuilt(self):
+        expected = contents(load_tree(self.file_name))
+        with open(tree_snapshot.snapshot_name(self.file_name), 'wb') as filep:
+            filep.write(b'TREESNP1' + b'\0' * 16)
+        self.assertEqual(contents(load_tree(self.file_name, True)), expected)
+        self.assertEqual(contents(load_tree(self.file_name, True)), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,36 +1,343 @@
+import sys
+import os
+import struct
+from array import array
+from bisect import bisect_left, insort
+from heapq import heappush, heappop
+
+#raw_input was renamed input in Python 3
+try:
+ raw_input
+except NameError:
+ raw_input=input
+
+
+#Binary tree file: magic, header (node count, height) and the filled slots as little endian 4 byte ints, the indexes then the values
+MAGIC=b'HEAPTRE1'
+HEADER=struct.Struct('<II')
+INT_TYPE='i'
+INT_LIMIT=2**31
+
+
+def levelAdd(levels,level,index):
+ """Add index to the sorted list levels[level]"""
+ if level in levels: insort(levels[level],index)
+ else: levels[level]=[index]
+
+def levelRemove(levels,level,index):
+ """Remove index from the sorted list levels[level] if it is there, an emptied level is dropped"""
+ indexes=levels.get(level)
+ if not indexes: return
+ position=bisect_left(indexes,index)
+ if position<len(indexes) and indexes[position]==index:
+  del indexes[position]
+  if not indexes: del levels[level]
+
+
+class heapStore ():
+ """Sparse storage for the tree, slot i has its children at 2i and 2i+1. Only the slots holding a value are kept, an empty slot reads as -999.
+ The store starts with room for height levels and grows a level at a time when a value is set past the last slot.
+ Slot i is on level i.bit_length() (the root is level 1). Each level keeps a sorted list of its filled slots and a set of its free slots, the empty
+ slots a node can be added at because their parent is filled, with a heap of them for their order (slots taken since are dropped when they reach
+ the top). So the first free slot of a level costs log time, and the free slots and open parents of a level are read in order a slot at a time,
+ neither sorts nor scans the level. Level order is index order, the next free slot is the first one of the highest level with any"""
+ def __init__(self,height=0,slots=None):
+  if height<0: raise ValueError("Height {} is below 0".format(height))
+  self.slots={}
+  self.size=2**height
+  self.filled={}
+  self.free={1:set([1])}
+  self.free_order={1:[1]}
+  if slots: self.fill(slots)
+
+ def fill(self,slots):
+  """Take slots, a dict of index to value where every node but the root has its parent, and index it in one pass"""
+  self.slots=slots
+  self.grow(max(slots))
+  self.filled={}
+  #Free slots are added in index order, so each heap push is an append
+  self.free={}
+  self.free_order={}
+  if 1 not in slots: self.addFree(1)
+  for index in sorted(slots):
+   self.filled.setdefault(index.bit_length(),[]).append(index)
+   for child in (2*index,2*index+1):
+    if child not in slots: self.addFree(child)
+
+ def addFree(self,index):
+  level=index.bit_length()
+  indexes=self.free.setdefault(level,set())
+  if index in indexes: return
+  indexes.add(index)
+  heappush(self.free_order.setdefault(level,[]),index)
+  self.tidyFree(level)
+
+ def removeFree(self,index):
+  level=index.bit_length()
+  indexes=self.free.get(level)
+  if indexes and index in indexes:
+   indexes.remove(index)
+   if not indexes:
+    del self.free[level]
+    del self.free_order[level]
+   else: self.tidyFree(level)
+
+ def tidyFree(self,level):
+  """Rebuild the heap of level once it is mostly slots taken since, so reading it stays in proportion to the free slots"""
+  order=self.free_order[level]
+  if len(order)>2*len(self.free[level])+16:
+   #A sorted list is a heap
+   order[:]=sorted(self.free[level])
+
+ def firstFree(self,level):
+  """The first free slot on level, None when it has none"""
+  indexes=self.free.get(level)
+  if not indexes: return None
+  order=self.free_order[level]
+  while order[0] not in indexes: heappop(order)
+  return order[0]
+
+ def __len__(self):
+  return self.size
+
+ def __getitem__(self,index):
+  return self.slots.get(index,-999)
+
+ def __setitem__(self,index,value):
+  if index<0: raise IndexError("heapStore index out of range")
+  self.grow(index)
+  level=index.bit_length()
+  if value==-999:
+   if index in self.slots:
+    del self.slots[index]
+    levelRemove(self.filled,level,index)
+    if index==1 or index//2 in self.slots: self.addFree(index)
+    #Its children can't be added any more
+    self.removeFree(2*index)
+    self.removeFree(2*index+1)
+  else:
+   if index not in self.slots:
+    levelAdd(self.filled,level,index)
+    self.removeFree(index)
+    for child in (2*index,2*index+1):
+     if child not in self.slots: self.addFree(child)
+   self.slots[index]=value
+
+ def filledSlots(self,level):
+  """Iterator of the filled slots on level, in order"""
+  return iter(self.filled.get(level,()))
+
+ def filledCount(self,level):
+  """Number of filled slots on level"""
+  return len(self.filled.get(level,()))
+
+ def isFilled(self,index,level):
+  """Whether slot index is a filled slot on level"""
+  return index.bit_length()==level and index in self.slots
+
+ def freeSlots(self,level):
+  """Iterator of the empty slots on level whose parent is filled, in order. Each slot read costs log time however wide the level is,
+  don't change the store while reading"""
+  indexes=self.free.get(level,())
+  order=self.free_order.get(level,[])
+  #The heap's entries smallest first, through a heap of (entry, position) with the children of each position read pushed
+  positions=[]
+  if order: positions.append((order[0],0))
+  last=None
+  while positions:
+   index,position=heappop(positions)
+   #A slot freed, taken and freed again is in the heap twice, the two come out together
+   if index in indexes and index!=last:
+    last=index
+    yield index
+   for child in (2*position+1,2*position+2):
+    if child<len(order): heappush(positions,(order[child],child))
+
+ def openParents(self,level):
+  """Iterator of the filled slots on level with at least one empty child, in order, read as freeSlots"""
+  last=None
+  for child in self.freeSlots(level+1):
+   if child//2!=last:
+    last=child//2
+    yield last
+
+ def nextFree(self):
+  """The first free slot in level order, where the next node of a complete tree goes"""
+  #There is always a free slot, a child of the last filled one
+  return self.firstFree(min(self.free))
+
+ def grow(self,index):
+  """Add levels until index fits"""
+  while index>=self.size: self.size=self.size*2
+
+ def height(self):
+  """Number of levels the store has room for"""
+  return self.size.bit_length()-1
+
+ def items(self):
+  """(index, value) for the filled slots in index order"""
+  return sorted(self.slots.items())
+
+
+def parseValue(text):
+ """A node value from text, N or -999 is an empty slot"""
+ if text.upper()=="N": return -999
+ return int(text)
+
+def readLevelOrder(filep):
+ """Values in level order from filep, separated by spaces or newlines, starting at the root"""
+ for line in filep:
+  for text in line.split():
+   yield parseValue(text)
+
+def readRecords(filep):
+ """(index, value) pairs from filep, one "index value" pair per line"""
+ for line_number,line in enumerate(filep,1):
+  fields=line.split()
+  if not fields: continue
+  if len(fields)!=2: raise ValueError("Line {}: expected index and value".format(line_number))
+  yield int(fields[0]),parseValue(fields[1])
+
+def openInput(file_name):
+ """file_name opened for reading, - is stdin"""
+ if file_name=="-": return sys.stdin
+ return open(file_name)
+
+def terminalWidth():
+ """Columns of the terminal, 80 when it can't be told"""
+ try:
+  import shutil
+  return shutil.get_terminal_size((80,24)).columns
+ except (ImportError,AttributeError):
+  return int(os.environ.get("COLUMNS",80))
+
+def levelLine(arr,start,count,width):
+ """The count slots of arr from start as one line of at most width characters, N for an empty slot.
+ Slots that don't fit are summarised, only the slots shown are read"""
+ items=[]
+ length=-1
+ for j in range(start,start+count):
+  value=arr[j]
+  if value==-999: text="N"
+  else: text=str(value)
+  length=length+len(text)+1
+  if length>width: break
+  items.append(text)
+ else: return " ".join(items)
+ #Too wide, drop slots until the summary fits
+ while True:
+  rest=count-len(items)
+  summary="... +{} more".format(rest)
+  filled=getattr(arr,"filled",None)
+  if filled!=None:
+   level=filled.get(start.bit_length(),())
+   summary=summary+" ({} filled)".format(bisect_left(level,start+count)-bisect_left(level,start+len(items)))
+  line=" ".join(items+[summary])
+  if len(line)<=width or not items: return line
+  items.pop()
+
+def intArray(values):
+ """values as a little endian int array"""
+ ints=array(INT_TYPE,values)
+ if sys.byteorder!="little": ints.byteswap()
+ return ints
+
+
 class buildTree ():
  """Please run the code  with Python 3"""
  def __init__(self):
   """Class to build your own tree data structure"""
   self.root_status=False
-  self.data_list=[]
+  self.data_list=heapStore()
+  self.current_level=1
+
+ def setStore(self,store):
+  """Make store the tree, adding continues below its last filled level"""
+  self.data_list=store
+  self.root_status=store[1]!=-999
   self.current_level=1
+  if store.slots: self.current_level=2**(max(store.slots).bit_length()-1)
+
+ def loadRecords(self,records):
+  """Fill the tree from (index, value) pairs in one pass, the root is index 1 and the children of i are 2i and 2i+1.
+  A value of -999 leaves its slot empty. Raises ValueError for an index below 1, an index given twice or a node without a parent"""
+  slots={}
+  for index,value in records:
+   if index<1: raise ValueError("Index {} is out of range".format(index))
+   if index in slots: raise ValueError("Index {} is given twice".format(index))
+   if value!=-999: slots[index]=value
+  #Every node but the root needs its parent, checked once over all the indexes
+  orphans=[index for index in slots if index>1 and index//2 not in slots]
+  if orphans: raise ValueError("Index {} has no parent".format(min(orphans)))
+  self.setStore(heapStore(0,slots))
+
+ def loadLevelOrder(self,values):
+  """Fill the tree from values in level order (root, then each level left to right), -999 or None for an empty slot"""
+  self.loadRecords((index,value) for index,value in enumerate(values,1) if value is not None)
+
+ def saveTree(self,file_name):
+  """Write the filled slots to the binary file file_name"""
+  items=self.data_list.items()
+  for index,value in items:
+   if index>=INT_LIMIT or not -INT_LIMIT<=int(value)<INT_LIMIT: raise ValueError("Index {} value {} does not fit the file".format(index,value))
+  with open(file_name,"wb") as filep:
+   filep.write(MAGIC)
+   filep.write(HEADER.pack(len(items),self.data_list.height()))
+   intArray([index for index,value in items]).tofile(filep)
+   intArray([int(value) for index,value in items]).tofile(filep)
+
+ def loadTree(self,file_name):
+  """Fill the tree from the binary file file_name written by saveTree"""
+  with open(file_name,"rb") as filep:
+   if filep.read(len(MAGIC))!=MAGIC: raise ValueError("{} is not a tree file".format(file_name))
+   header=filep.read(HEADER.size)
+   if len(header)<HEADER.size: raise ValueError("{} is truncated".format(file_name))
+   count,height=HEADER.unpack(header)
+   indexes=array(INT_TYPE)
+   values=array(INT_TYPE)
+   try:
+    indexes.fromfile(filep,count)
+    values.fromfile(filep,count)
+   except EOFError: raise ValueError("{} is truncated".format(file_name))
+  if sys.byteorder!="little":
+   indexes.byteswap()
+   values.byteswap()
+  self.loadRecords(zip(indexes,values))
+  self.data_list.grow(2**height-1)
   
  def our_input(self, prompt):
   val=raw_input(prompt)
   return val
  
  def possible_parents(self):
-  result=[]
-  for i in range(self.current_level,self.current_level*2):
-    if self.data_list[i]!=-999: result.append(i)
-  return result
+  #The filled slots on the current level, kept by the store
+  return self.data_list.filledSlots(self.current_level.bit_length())
+
+ def isPossibleParent(self,index):
+  return self.data_list.isFilled(index,self.current_level.bit_length())
+
+ def insertNext(self,value):
+  """Add value at the first free slot in level order, for scripted builders, returns its index"""
+  index=self.data_list.nextFree()
+  self.data_list[index]=value
+  self.root_status=True
+  if index>=self.current_level*2: self.current_level=2**(index.bit_length()-1)
+  return index
 
  def addNode(self,node):
   """The following function will add the node on the left side of the parent"""   
-  val=self.possible_parents()
-  if len(val)==0: 
+  if self.data_list.filledCount(self.current_level.bit_length())==0: 
    print ("Error: No parent available. Cannot add any value as a left node")
    return
   else:
    print ("\n")
    print ("---List of possible parents:")
-   print ("---Index: " + str([data for data in val]))
-   print ("---Value: " + str([self.data_list[data] for data in val]))
+   print ("---Index: " + str([data for data in self.possible_parents()]))
+   print ("---Value: " + str([self.data_list[data] for data in self.possible_parents()]))
    print ("---Note: The above list shows the indexes and the values of the possible parents. Select the index for which you want to assign the current node as parent")
    while True:
     input_user=int(self.our_input(">>"))
-    if input_user not in val: print ("Error: Incorrect input. Try Again")
+    if not self.isPossibleParent(input_user): print ("Error: Incorrect input. Try Again")
     else: break
      
    input_value=int(self.our_input("---Enter the value for {} node with  parent {} >> ".format(node,self.data_list[input_user])))
@@ -96,28 +403,27 @@ class buildTree ():
   elif input_user.lower()=="show": 
     self.printTree(self.data_list)
 
- def printTree(self,arr):
-  import sys
-  i,k,j=1,1,1
-  space=int((len(arr))/2)
-  while i<len(arr):
-   sys.stdout.write (space*" ")
-   while k<=i:
-    if arr[j]==-999: sys.stdout.write ("N")
-    else: sys.stdout.write (str(arr[j]))
-    sys.stdout.write (" ")
-    j+=1
-    k=k+1
-    space-=1
-   k=1
-   i=i*2
-   print ("\n")
+ def printTree(self,arr,first=1,last=None,root=1,width=None,stream=None):
+  """Print levels first to last (all by default) of the subtree at slot root, counting its root as level 1, one line per level, centred.
+  A level wider than width (the terminal by default) is cut short and the rest summarised. The lines are written in one go"""
+  if width==None: width=terminalWidth()
+  if stream==None: stream=sys.stdout
+  depth=len(arr).bit_length()-root.bit_length()
+  if last==None or last>depth: last=depth
+  lines=[]
+  for level in range(max(first,1),last+1):
+   #Level of the subtree, 2**(level-1) slots starting below root
+   lines.append(levelLine(arr,root<<(level-1),1<<(level-1),width))
+  widest=max([len(line) for line in lines]+[0])
+  stream.write("".join(" "*((widest-len(line))//2)+line+"\n\n" for line in lines))
+  stream.flush()
 		 
- def main(self):
-  while True:
+ def main(self,loaded=False):
+  """Interactive menu, a loaded tree skips the height question"""
+  while not loaded:
    try:
     user_input= int(self.our_input("Enter the height of your tree (Note: Level starts at 1) >> "))
-    self.data_list=[-999 for i in range(0,2**user_input)] #Initializing the array based on the height of the tree
+    self.data_list=heapStore(user_input) #Sparse storage, it grows if a node is added below the last level
     break
    except: print ("Error: Incorrect Format. Try again")
   var_a=0
@@ -125,6 +431,56 @@ class buildTree ():
    var_a=self.message() 
   
 
-x=buildTree()
-x.main()
+def usage():
+ print ("Usage: %s [-h] [-l FILE | -r FILE | -b FILE] [-o FILE] [-t FIRST:LAST] [-n INDEX]"%sys.argv[0])
+ print ("           -h       Show this message, and exit")
+ print ("           -l FILE  Load values in level order from FILE (- for stdin), N for an empty slot")
+ print ("           -r FILE  Load \"index value\" records from FILE (- for stdin)")
+ print ("           -b FILE  Load the binary tree file FILE")
+ print ("           -o FILE  Save the loaded tree to the binary tree file FILE, and exit")
+ print ("           -t FIRST:LAST  Print levels FIRST to LAST of the loaded tree (either may be left out), and exit")
+ print ("           -n INDEX       Print the subtree at slot INDEX of the loaded tree, and exit")
+ print ("\n")
+ sys.exit(0)
+
+def commandLineArguments():
+ """Walk the command line, return the load option (l, r or b) and its file, the file to save to and the print options (None when not printing)"""
+ load,load_file,save_file,levels,root=None,None,None,None,None
+ args=sys.argv[1:]
+ try:
+  while args:
+   arg=args.pop(0)
+   if arg in ("-l","-r","-b") and args and load==None:
+    load,load_file=arg[1],args.pop(0)
+   elif arg=="-o" and args: save_file=args.pop(0)
+   elif arg=="-t" and args:
+    first,last=args.pop(0).split(":")
+    levels=(int(first or 1),int(last) if last else None)
+   elif arg=="-n" and args: root=int(args.pop(0))
+   else: usage()
+ except ValueError: usage()
+ if (save_file!=None or levels!=None or root!=None) and load==None: usage()
+ return load,load_file,save_file,levels,root
+
+
+if __name__ == '__main__':
+ x=buildTree()
+ load,load_file,save_file,levels,root=commandLineArguments()
+ try:
+  if load=="b": x.loadTree(load_file)
+  elif load!=None:
+   filep=openInput(load_file)
+   if load=="l": x.loadLevelOrder(readLevelOrder(filep))
+   else: x.loadRecords(readRecords(filep))
+ except (IOError,ValueError) as error:
+  print ("Error: {}".format(error))
+  sys.exit(1)
+ if save_file!=None:
+  x.saveTree(save_file)
+  sys.exit(0)
+ if levels!=None or root!=None:
+  first,last=levels or (1,None)
+  x.printTree(x.data_list,first,last,root or 1)
+  sys.exit(0)
+ x.main(load!=None)
 
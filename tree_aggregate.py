@@ -0,0 +1,156 @@
+"""
+    tree_aggregate.py
+
+    Notes:
+        Per-node aggregates over the parent and depth arrays of a compact_tree (tree_compact.py):
+        subtree sizes, leaf counts under each node, the depth histogram and subtree sums of a
+        numeric value per node.
+
+        With NumPy installed the arrays are used in place (no copy, a memory-mapped snapshot
+        included) and every aggregate is a bottom-up pass one level at a time: all nodes of a
+        level add into their parents in a single numpy.add.at, there is no per-node Python loop.
+        Without NumPy the same results come from a plain Python loop over the ids, results are
+        then lists rather than numpy arrays.
+
+        Node ids are the compact_tree's, parents always come before their children (see
+        tree.parent_first_nodes) and node 0 is the root.
+"""
+
+# NumPy is optional
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import tree_compact
+
+
+class aggregate_engine(object):
+    def __init__(self, source, use_numpy=None):
+        """
+            Aggregates over source, a compact_tree or a tree_data.tree (copied into a compact_tree)
+            use_numpy picks the implementation, by default NumPy whenever it is installed
+        """
+        if not isinstance(source, tree_compact.compact_tree):
+            source = tree_compact.from_tree(source)
+        self.compact = source
+        if use_numpy == None:
+            use_numpy = numpy != None
+        self.use_numpy = use_numpy
+        if use_numpy:
+            dtype = numpy.dtype(tree_compact.ID_TYPE)
+            # Views on the compact_tree's arrays, numpy indexes and bincounts with int32 as is
+            self.parent = numpy.frombuffer(source.parent, dtype=dtype)
+            self.depth = numpy.frombuffer(source.depth, dtype=dtype)
+            # The ids at each depth, levels[d]
+            order = numpy.argsort(self.depth, kind='stable')
+            bounds = numpy.cumsum(numpy.bincount(self.depth))
+            self.levels = numpy.split(order, bounds[:-1])
+        else:
+            self.parent = source.parent
+            self.depth = source.depth
+        self.counts = None
+
+    def __len__(self):
+        return len(self.parent)
+
+    def accumulate(self, values):
+        """
+            return values summed up the tree, each node's result is its value plus its descendants'
+        """
+        if self.use_numpy:
+            totals = numpy.array(values, copy=True)
+            # Deepest level first, each level adds into the one above it
+            for level in reversed(self.levels[1:]):
+                parents = self.parent[level]
+                # Nodes whose parent was never found are at depth 0, so parents is never -1 here
+                numpy.add.at(totals, parents, totals[level])
+            return totals
+        totals = list(values)
+        parent = self.parent
+        # Children always come after their parents, so walking ids backwards is bottom up
+        for node_id in range(len(totals) - 1, -1, -1):
+            parent_id = parent[node_id]
+            if parent_id != -1:
+                totals[parent_id] += totals[node_id]
+        return totals
+
+    def child_counts(self):
+        """
+            return the number of children of each node
+        """
+        if self.counts is None:
+            if self.use_numpy:
+                parents = self.parent[self.parent != -1]
+                self.counts = numpy.bincount(parents, minlength=len(self.parent))
+            else:
+                self.counts = [0] * len(self.parent)
+                for parent_id in self.parent:
+                    if parent_id != -1:
+                        self.counts[parent_id] += 1
+        return self.counts
+
+    def subtree_sizes(self):
+        """
+            return the number of nodes in each node's subtree, the node included
+        """
+        if self.use_numpy:
+            return self.accumulate(numpy.ones(len(self.parent), dtype=numpy.intp))
+        return self.accumulate([1] * len(self.parent))
+
+    def leaf_counts(self):
+        """
+            return the number of leaves in each node's subtree, a leaf counts itself
+        """
+        counts = self.child_counts()
+        if self.use_numpy:
+            return self.accumulate((counts == 0).astype(numpy.intp))
+        return self.accumulate([int(count == 0) for count in counts])
+
+    def subtree_sums(self, values):
+        """
+            return the sum of values (one number per node id) over each node's subtree
+        """
+        if self.use_numpy:
+            return self.accumulate(numpy.asarray(values))
+        return self.accumulate(values)
+
+    def depth_histogram(self):
+        """
+            return the number of nodes at each depth, index 0 is the root level
+        """
+        if self.use_numpy:
+            return numpy.bincount(self.depth)
+        histogram = []
+        for depth in self.depth:
+            while depth >= len(histogram):
+                histogram.append(0)
+            histogram[depth] += 1
+        return histogram
+
+    def leaves(self):
+        """
+            return the ids of the nodes without children, the root excluded like tree.get_leaves
+        """
+        counts = self.child_counts()
+        if self.use_numpy:
+            ids = numpy.flatnonzero(counts == 0)
+            return ids[ids != 0]
+        return [node_id for node_id in range(1, len(counts)) if counts[node_id] == 0]
+
+    def lowest(self):
+        """
+            return the ids of the deepest nodes, like tree.get_lowest
+        """
+        if len(self.parent) == 0:
+            return []
+        if self.use_numpy:
+            return self.levels[-1]
+        lowest = max(self.depth)
+        return [node_id for node_id in range(len(self.depth)) if self.depth[node_id] == lowest]
+
+    def names(self, node_ids):
+        """
+            return the node_name of each of node_ids
+        """
+        return [self.compact.name(node_id) for node_id in node_ids]
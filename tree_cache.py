@@ -0,0 +1,96 @@
+"""
+    tree_cache.py
+
+    Notes:
+        Bounded LRU cache for the query methods of the tree in tree_data.py (find_node, find,
+        find_parents, get_leaves, get_lowest), switched on with tree.enable_cache(). A repeated
+        query costs a dict lookup instead of the query itself.
+
+        Every entry belongs to one tree.version, the first lookup after the tree changed (or was
+        reloaded) empties the cache, so a stale answer is never returned.
+
+        Cached answers are shared, every hit returns the same list, callers must not change it.
+        Lookups take no lock, when threads race on one cache the worst case is a wrong hit/miss
+        count or a slightly off LRU order, never a wrong answer.
+"""
+
+# Standard library imports
+from collections import OrderedDict
+from functools import wraps
+
+DEFAULT_SIZE = 1024
+
+
+class query_cache(object):
+    def __init__(self, maxsize=DEFAULT_SIZE):
+        """
+            Keep up to maxsize answers, the least recently used goes first
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, version, key):
+        """
+            return the answer for key at tree version, or None
+        """
+        if version != self.version:
+            # The tree changed, nothing cached is valid any more
+            if self.entries:
+                self.invalidations = self.invalidations + 1
+            self.entries = OrderedDict()
+            self.version = version
+        try:
+            # Move key to the most recently used end
+            value = self.entries.pop(key)
+            self.entries[key] = value
+        except KeyError:
+            self.misses = self.misses + 1
+            return None
+        self.hits = self.hits + 1
+        return value
+
+    def put(self, version, key, value):
+        """
+            keep value as the answer for key at tree version
+        """
+        if version != self.version:
+            return
+        self.entries[key] = value
+        while len(self.entries) > self.maxsize:
+            try:
+                self.entries.popitem(last=False)
+            except KeyError:
+                break
+
+    def clear(self):
+        self.entries = OrderedDict()
+
+    def stats(self):
+        """
+            return the hit, miss and invalidation counts and the cache size
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'invalidations': self.invalidations,
+                'size': len(self.entries), 'maxsize': self.maxsize}
+
+
+def cached_query(method):
+    """
+        Decorator for a tree query method, answered from tree.cache when the tree has one
+    """
+    name = method.__name__
+
+    @wraps(method)
+    def cached(self, *args):
+        if self.cache == None:
+            return method(self, *args)
+        key = (name,) + args
+        value = self.cache.get(self.version, key)
+        if value == None:
+            value = method(self, *args)
+            self.cache.put(self.version, key, value)
+        return value
+    return cached
@@ -0,0 +1,101 @@
+"""
+    tree_client.py
+
+    Notes:
+        Client for tree_server.py, one persistent connection per tree_client. Every query method
+        returns the server's answer as a dict, pipeline() sends a whole list of queries before
+        reading the answers back, so the round trips overlap.
+
+            client = tree_client()
+            client.find_node('HERBS')['nodes']
+            client.pipeline(['F HERBS', 'P GREEN', 'S SPINACH'])
+            client.close()
+"""
+
+# Standard library imports
+import json
+import socket
+
+DEFAULT_PORT = 7821
+# Queries sent ahead of reading their answers in pipeline(), bounds what sits in the socket buffers
+PIPELINE_WINDOW = 256
+
+
+class tree_client(object):
+    def __init__(self, port=DEFAULT_PORT, path=None, host='127.0.0.1'):
+        """
+            Connect to the server at host:port, or the Unix socket path
+        """
+        if path != None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(path)
+        else:
+            self.sock = socket.create_connection((host, port))
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile('rb')
+
+    def send(self, queries):
+        """
+            send query lines without waiting for the answers
+        """
+        self.sock.sendall(''.join(query.strip() + '\n' for query in queries).encode('utf-8'))
+
+    def receive(self):
+        """
+            read the next answer
+        """
+        line = self.reader.readline()
+        if not line:
+            raise EOFError('connection closed by the server')
+        return json.loads(line.decode('utf-8'))
+
+    def query(self, command, arg=''):
+        """
+            send one query and return its answer
+        """
+        self.send(['{} {}'.format(command, arg)])
+        return self.receive()
+
+    def pipeline(self, queries):
+        """
+            answer a list of query lines, keeping up to PIPELINE_WINDOW of them in flight
+        """
+        queries = list(queries)
+        answers = []
+        sent = 0
+        while len(answers) < len(queries):
+            if sent < len(queries):
+                window = queries[sent:sent + PIPELINE_WINDOW - (sent - len(answers))]
+                self.send(window)
+                sent = sent + len(window)
+            answers.append(self.receive())
+        return answers
+
+    def find_node(self, name):
+        return self.query('F', name)
+
+    def find_parents(self, name):
+        return self.query('P', name)
+
+    def leaves(self):
+        return self.query('L')
+
+    def lowest(self):
+        return self.query('N')
+
+    def subtree(self, name):
+        return self.query('S', name)
+
+    def search(self, text):
+        return self.query('M', text)
+
+    def stats(self):
+        return self.query('STATS')
+
+    def close(self):
+        try:
+            self.send(['QUIT'])
+        except socket.error:
+            pass
+        self.reader.close()
+        self.sock.close()
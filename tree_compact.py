@@ -0,0 +1,161 @@
+"""
+    tree_compact.py
+
+    Notes:
+        Struct-of-arrays storage for the tree in tree_data.py. Nodes are integer ids in file order,
+        every distinct name is stored once in a name table, and the per-node fields are kept in
+        flat typed arrays instead of one Python object per node:
+
+            names:       name table, names[name_id] is the string
+            node_name:   name id of each node
+            parent_name: name id of each node's parent_name
+            parent:      node id of each node's parent, -1 for the root or an unresolved parent
+            depth:       the indent of each node
+
+        Loading follows tree.add_node exactly, a parent_name resolves to the first node loaded
+        with that name.
+"""
+
+# Standard library imports
+import sys
+import gzip
+from array import array
+
+from tree_data import tree, parse_lines
+
+
+# Typecode for the id and depth arrays, 4 byte signed ints
+ID_TYPE = 'i'
+
+
+class compact_tree(object):
+    def __init__(self):
+        """
+            Create an empty compact tree, the name table and the per-node arrays
+        """
+        self.names = []
+        self.name_ids = {}
+        # first[name_id] is the first node id with that name, or -1
+        self.first = array(ID_TYPE)
+        self.node_name = array(ID_TYPE)
+        self.parent_name = array(ID_TYPE)
+        self.parent = array(ID_TYPE)
+        self.depth = array(ID_TYPE)
+        self.errors = []
+
+    def __len__(self):
+        """ the number of nodes """
+        return len(self.node_name)
+
+    def name_id(self, name):
+        """
+            return the id of name in the name table, adding it when it is new
+        """
+        name_id = self.name_ids.get(name)
+        if name_id == None:
+            name_id = len(self.names)
+            self.names.append(name)
+            self.name_ids[name] = name_id
+            self.first.append(-1)
+        return name_id
+
+    def add_node(self, parent_name, node_name):
+        """
+            Append a node, resolving its parent by name like tree.add_node, returns the new node id
+        """
+        return self.add_ids(self.name_id(parent_name), self.name_id(node_name))
+
+    def add_ids(self, parent_id, name_id):
+        """
+            add_node for names already in the name table, by their name ids
+        """
+        node_id = len(self.node_name)
+        # The first node added is the root, later ones look their parent up by name
+        if node_id == 0:
+            parent = -1
+        else:
+            parent = self.first[parent_id]
+        self.node_name.append(name_id)
+        self.parent_name.append(parent_id)
+        self.parent.append(parent)
+        # root and unresolved parents are at indent 0
+        if parent == -1:
+            self.depth.append(0)
+        else:
+            self.depth.append(self.depth[parent] + 1)
+        # Only the first node with a given name is used as a parent
+        if self.first[name_id] == -1:
+            self.first[name_id] = node_id
+        return node_id
+
+    def input_stream(self, lines):
+        """
+            Read 'parent|child' lines from any file-like object or iterator, see tree.input_stream
+        """
+        for parent_name, node_name in parse_lines(lines, self.errors):
+            self.add_node(parent_name, node_name)
+
+    def input_tree(self, file_name):
+        """
+            Read in the file file_name, '-' reads stdin and a name ending in .gz is read through
+            gzip, as tree.input_tree does
+        """
+        if file_name == '-':
+            self.input_stream(sys.stdin)
+        elif file_name.endswith('.gz'):
+            with gzip.open(file_name) as filep:
+                self.input_stream(filep)
+        else:
+            with open(file_name) as filep:
+                self.input_stream(filep)
+
+    def name(self, node_id):
+        """ return the node_name of node_id """
+        return self.names[self.node_name[node_id]]
+
+    def to_tree(self, file_name=None):
+        """
+            Build a linked tree (tree_data.tree) holding the same nodes and parent links
+        """
+        tree_structure = tree(file_name)
+        # Decode each name once, a snapshot's name table decodes on every lookup
+        names = list(self.names)
+        parent = self.parent
+        parent_name = self.parent_name
+        insert_node = tree_structure.insert_node
+        nodes = []
+        for i, name_id in enumerate(self.node_name):
+            # parents always come before their children, so the parent node already exists
+            if parent[i] == -1:
+                parent_node = None
+            else:
+                parent_node = nodes[parent[i]]
+            nodes.append(insert_node(names[parent_name[i]], names[name_id], parent_node))
+        return tree_structure
+
+
+def from_tree(tree_structure, nodes=None):
+    """
+        Build a compact_tree from a linked tree (tree_data.tree), in file order with parents always
+        first (see tree.parent_first_nodes), or in the order of nodes (parents first as well)
+    """
+    if nodes == None:
+        nodes = tree_structure.parent_first_nodes()
+    compact = compact_tree()
+    node_ids = {}
+    for node in nodes:
+        node_id = len(compact.node_name)
+        node_ids[node] = node_id
+        parent_id = compact.name_id(node.parent_name)
+        name_id = compact.name_id(node.node_name)
+        compact.node_name.append(name_id)
+        compact.parent_name.append(parent_id)
+        # Copy the parent link as it is, rather than resolving the name again
+        if node.parent == None:
+            compact.parent.append(-1)
+        else:
+            compact.parent.append(node_ids[node.parent])
+        compact.depth.append(node.indent)
+        if compact.first[name_id] == -1:
+            compact.first[name_id] = node_id
+    return compact
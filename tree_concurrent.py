@@ -0,0 +1,130 @@
+"""
+    tree_concurrent.py
+
+    Notes:
+        Read-mostly sharing of a tree (tree_data.py) between threads, or between the tasks of an
+        asyncio server, with snapshot isolation.
+
+        versioned_tree.current is the published tree. Readers take that reference once and run
+        all their queries against it, it never changes under them: writers never touch a
+        published tree, they change a private copy and publish it by replacing the reference,
+        which is a single atomic assignment. Readers take no lock, so they never wait, and a
+        reader never sees a half loaded or half changed tree.
+
+        Writers are serialised by a lock and each update() copies the whole tree, so batch
+        changes into one update() rather than one per change.
+
+        Before a tree is published its emptied trailing levels are dropped (and, with intervals,
+        its interval index and name search index built), so queries on a published tree only
+        read it.
+"""
+
+# Standard library imports
+import threading
+from contextlib import contextmanager
+
+from tree_data import node, tree, load_tree, live_nodes, child_list, level_list
+
+
+def copy_tree(tree_structure):
+    """
+        return an independent copy of tree_structure, its version carried over
+
+        Nodes are cloned in file order and every children list, index list and levels bucket
+        keeps its order, so the copy resolves names and answers queries exactly as the original
+    """
+    copy = tree(tree_structure.file_name)
+    clones = {}
+    original = tree_structure.root
+    while original:
+        clone = node(original.parent_name, original.node_name, None)
+        clone.indent = original.indent
+        clones[original] = clone
+        if copy.root == None:
+            copy.root = clone
+        else:
+            copy.last.next = clone
+            clone.prev = copy.last
+        copy.last = clone
+        original = original.next
+    # A moved node's parent can come later in file order, link parents once every node exists
+    for original, clone in clones.items():
+        if original.parent != None:
+            clone.parent = clones[original.parent]
+        if original.children:
+            clone.children = child_list([clones[child] for child in live_nodes(original.children)])
+    for index, copy_index in ((tree_structure.name_index, copy.name_index), (tree_structure.parent_index, copy.parent_index)):
+        for name, nodes in index.items():
+            # The same kind of node_list, holes squeezed out
+            copy_index[name] = type(nodes)([clones[indexed] for indexed in nodes.live()])
+    copy.levels = [level_list([clones[level_node] for level_node in bucket.live()]) for bucket in tree_structure.levels]
+    copy.errors = list(tree_structure.errors)
+    copy.version = tree_structure.version
+    if tree_structure.cache != None:
+        copy.enable_cache(tree_structure.cache.maxsize)
+    return copy
+
+
+def settle(tree_structure, intervals=False):
+    """
+        do the lazy work queries would otherwise do on first use, so reads don't write
+    """
+    # Drops empty trailing levels
+    tree_structure.level_sizes()
+    if intervals:
+        tree_structure.interval_index()
+        tree_structure.name_search()
+
+
+class versioned_tree(object):
+    def __init__(self, tree_structure=None, intervals=False):
+        """
+            Share tree_structure (an empty tree by default), with intervals every published tree
+            has its interval index built before readers see it
+            generation counts the trees published after the first, by update() and load()
+        """
+        if tree_structure == None:
+            tree_structure = tree(None)
+        self.intervals = intervals
+        self.lock = threading.Lock()
+        self.generation = 0
+        settle(tree_structure, intervals)
+        self.current = tree_structure
+
+    def snapshot(self):
+        """
+            return the published tree, read it only, take it once per request
+        """
+        return self.current
+
+    def publish(self, tree_structure):
+        """
+            make tree_structure the published tree, the caller must hold the lock
+        """
+        settle(tree_structure, self.intervals)
+        self.generation = self.generation + 1
+        # A single reference assignment, readers see the old tree or the new one
+        self.current = tree_structure
+
+    @contextmanager
+    def update(self):
+        """
+            with versioned_tree.update() as tree_structure: change a private copy of the published
+            tree, it is published when the block ends and dropped if the block raises
+        """
+        with self.lock:
+            copy = copy_tree(self.current)
+            yield copy
+            self.publish(copy)
+
+    def load(self, file_name, snapshot=False):
+        """
+            load file_name into a new tree and publish it, readers keep the old tree meanwhile
+        """
+        tree_structure = load_tree(file_name, snapshot)
+        with self.lock:
+            # The query cache setting carries over, as it does through copy_tree
+            if self.current.cache != None:
+                tree_structure.enable_cache(self.current.cache.maxsize)
+            self.publish(tree_structure)
+        return tree_structure
@@ -13,7 +13,7 @@
         
         FYI: This was written and tested utilizing Python 2.710
             
-        Usage: python tree_data.py [-h] [-f FILE]
+        Usage: python tree_data.py [-h] [-f FILE] [-s]
     
         
 """
@@ -21,9 +21,166 @@
 # Standard library imports
 import sys   
 import os
+import gzip
+import heapq
+from collections import deque
+from contextlib import contextmanager
 
+from tree_cache import query_cache, cached_query
+
+# Indent prefixes kept by write_tree, a deep chain would otherwise hold every prefix at once
+PREFIX_CACHE = 1024
+
+
+def parse_lines(lines, errors):
+    """
+        Generator of (parent_name, node_name) pairs from 'parent|child' lines, read one at a time
+        
+        Blank lines are skipped, lines without a '|' are appended to errors as
+        (line_number, message) and skipped
+    """
+    # Iterate each line, counting from 1 for error messages
+    line_number = 0
+    for line in lines:
+        line_number = line_number + 1
+        # Binary streams (gzip, sockets) hand back bytes, decode them
+        if not isinstance(line, str):
+            line = line.decode('utf-8')
+        # Skip blank lines
+        if not line.strip():
+            continue
+        # Split up each line, a line without the separator is reported and skipped
+        txt=line.split('|')
+        if len(txt) < 2:
+            errors.append((line_number, "missing '|' separator: {}".format(line.strip())))
+            continue
+        # Strip the parent_name and node_name
+        yield txt[0].strip(), txt[1].strip()
+
+
+def replace_file(source, target):
+    """
+        Rename source over target in one step, readers see the old target or the new one
+        
+        os.replace does that on every platform that has it (Python 3). Python 2's os.rename
+        won't replace a file on Windows, there target is removed first and for a moment
+        neither file exists
+    """
+    if hasattr(os, 'replace'):
+        os.replace(source, target)
+    else:
+        if os.name == 'nt' and os.path.exists(target):
+            os.remove(target)
+        os.rename(source, target)
+
+
+@contextmanager
+def replaced_file(file_name, mode='w'):
+    """
+        with replaced_file(file_name) as filep: write the new contents of file_name to filep
+        
+        filep is a temporary file next to file_name, flushed to disk and put in its place (see
+        replace_file) when the block ends, so file_name is never half written. The temporary
+        file is removed if the block raises
+    """
+    temp_name = '{}.tmp{}'.format(file_name, os.getpid())
+    try:
+        with open(temp_name, mode) as filep:
+            yield filep
+            filep.flush()
+            os.fsync(filep.fileno())
+        replace_file(temp_name, file_name)
+    except:
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+        raise
+
+
+class node_list(list):
+    """
+        List of nodes in file order that a node is removed from in O(1): each node keeps its place
+        in the list (in the node slot named by SLOT), removing it leaves a None hole there, and the
+        holes are squeezed out once they are half of the list, so a list is never only holes.
+        Read it through live_nodes() and first(), which skip the holes
+    """
+    __slots__ = ('holes', 'start')
+    SLOT = None
+
+    def __init__(self, nodes=()):
+        # Filled in one go, appending would over-allocate the (mostly single node) lists
+        list.__init__(self, nodes)
+        self.holes = 0
+        # Nothing before start is live, so first() doesn't rescan leading holes
+        self.start = 0
+        for position in range(len(self)):
+            setattr(self[position], self.SLOT, position)
+
+    def add(self, node):
+        setattr(node, self.SLOT, len(self))
+        self.append(node)
+
+    def discard(self, node):
+        self[getattr(node, self.SLOT)] = None
+        self.holes = self.holes + 1
+        if self.holes * 2 > len(self):
+            live = [live_node for live_node in self if live_node != None]
+            self[:] = live
+            for position in range(len(live)):
+                setattr(live[position], self.SLOT, position)
+            self.holes = 0
+            self.start = 0
+
+    def live(self):
+        """ iterator of the nodes, skipping the holes """
+        if not self.holes:
+            return iter(self)
+        return (node for node in self if node != None)
+
+    def first(self):
+        """ the first node, None when the list is empty """
+        while self.start < len(self):
+            if self[self.start] != None:
+                return self[self.start]
+            self.start = self.start + 1
+        return None
+
+
+class child_list(node_list):
+    __slots__ = ()
+    SLOT = 'child_position'
+
+
+class name_list(node_list):
+    __slots__ = ()
+    SLOT = 'name_position'
+
+
+class parent_list(node_list):
+    __slots__ = ()
+    SLOT = 'parent_position'
+
+
+class level_list(node_list):
+    __slots__ = ()
+    SLOT = 'level_position'
+
+
+def live_nodes(nodes):
+    """
+        iterator of the nodes in a children, index or levels list (a node_list), none for None or ()
+    """
+    if nodes:
+        return nodes.live()
+    return iter(())
+
+
+class node(object):
+    # Fixed attribute slots instead of a per-node __dict__, this is most of a large tree's memory
+    # The positions are the node's places in its parent's children, the two index lists and its
+    # levels bucket
+    __slots__ = ('node_name', 'parent_name', 'parent', 'indent', 'next', 'prev', 'children',
+                 'child_position', 'name_position', 'parent_position', 'level_position')
 
-class node():
     def __init__(self, parent_name, node_name, parent):
         """
             Data structure to hold a tree node, which includes:
@@ -31,7 +188,9 @@ class node():
                 node_name:Name of this node
                 parent_link: Link to parent node
                 
-            It also saves the indent for this node, and initiailizes next, the next node link, to None
+            It also saves the indent for this node, and initiailizes next and prev, the next and
+            previous node links, to None and children, the child nodes in file order, to an empty
+            tuple (a child_list once one is added, read it through live_nodes)
         """
         # Get node_name, parent_name and parent's link
         self.node_name = node_name
@@ -43,81 +202,98 @@ class node():
         # else: indent=parent indent + 1
         else:
             self.indent = parent.indent + 1
-        # Initialize the next link to None
+        # Initialize the next and prev links to None
         self.next = None
+        self.prev = None
+        # Leaves share the empty tuple, the tree swaps in a list when the first child is added
+        self.children = ()
         
     def show(self):
         """ show the NODE as parent|node_name """
         print ('    NODE: {}|{}'.format(self.parent_name,self.node_name))
+        
+    def debug(self):
+        """ debug the NODE with additional info """
+        print ('[{}|{}|{}|{}]'.format(self.node_name,self.parent_name,self.indent,self.next))
 
 class tree():
     def __init__(self, file_name):
         """
             Save the tree file_name and init root, last nodes
+            
+            name_index maps a node_name to the name_list of nodes with that name, in the order they
+            got it (loaded or renamed), the first one is the node a later line's parent_name
+            resolves to. parent_index maps a parent_name to the parent_list of nodes with that
+            parent_name. levels[indent] is the level_list of nodes at that indent, in file order
+            except that moved nodes come after the others. Removing a node from any of these, or
+            from its parent's children, costs O(1) (see node_list). errors holds
+            (line_number, message) for any malformed input line
+            
+            version counts the changes made to the tree, so anything derived from it (like the
+            interval index) can tell when it is out of date
         """
         self.file_name = file_name
         self.root = None
         self.last = None
+        self.name_index = {}
+        self.parent_index = {}
+        self.levels = []
+        self.errors = []
+        self.version = 0
+        self.intervals = None
+        self.searcher = None
+        self.cache = None
         
+    def enable_cache(self, maxsize=1024):
+        """
+            answer find_node, find, find_parents, get_leaves and get_lowest through an LRU cache of
+            maxsize answers (tree_cache.py), cached answers are shared lists, don't change them
+        """
+        self.cache = query_cache(maxsize)
+        return self.cache
+
+    @cached_query
     def find_node(self, text):
         """
             find node which has text as the node_name, a list of results are returned, just in case
         """
-        nodes=[]
-        node = self.root
-        while node:
-            if text == node.node_name:
-                nodes.append(node)
-            # Point node to next one
-            node = node.next
-        return nodes
+        # Copy the index entry, so the caller can't change the index
+        return list(live_nodes(self.name_index.get(text)))
 
+    @cached_query
     def find_parents(self, text):
         """
             find one or more parents with text name as parent, return a list of nodes
         """
-        nodes = []
-        node = self.root
-        while node:
-            if text == node.parent_name:
-                nodes.append(node)
-            # Point node to next one
-            node = node.next
-        return nodes
+        # Copy the index entry, so the caller can't change the index
+        return list(live_nodes(self.parent_index.get(text)))
 
     def find_parent(self, text):
         """
-            find a nodes parent name
+            find a nodes parent name, the first node loaded with that name wins
         """
-        node = self.root
-        while node:
-            if text == node.node_name:
-                return node
-            # Point node to next one
-            node = node.next
+        nodes = self.name_index.get(text)
+        if nodes:
+            return nodes.first()
         return None
 
     def isnotparent(self, node):
         """
             returns whether a node is a parent of another node
         """
-        # look at all children of node
-        test_node = node.next
-        while test_node:
-            # See whether node is test_node's parent
-            if test_node.parent == node:
-                # Return False, node test_node is a parent
-                return False
-            # link to next test_node
-            test_node = test_node.next
-        return True
+        # The node is not a parent when nothing was added to its children
+        return not node.children
             
+    @cached_query
     def get_leaves(self):
         """
             find leaves (a node without children)
             search in self.last ->link
         """
         nodes=[]
+        # Deletes can leave the tree empty
+        if self.root == None:
+            return nodes
         node = self.root.next
         while node:
             # See whether this node is NOT a parent, if it isn't append to nodes list
@@ -131,90 +307,524 @@ class tree():
         """
             get the lowest nodes indent level
         """
-        indent = 0
-        # Start at root
-        node = self.root
-        while node:
-            # If the indent is higher, use the higher indent
-            if node.indent > indent:
-                indent = node.indent
-            # Go to next node
-            node=node.next
-        return indent
+        # levels has one entry per indent in use, the last one is the lowest
+        while self.levels and not self.levels[-1]:
+            # Drop levels emptied by deletes and moves, a level_list is never only holes
+            self.levels.pop()
+        if self.levels:
+            return len(self.levels) - 1
+        return 0
         
+    @cached_query
     def get_lowest(self):
         """
             get the lowest nodes, based on the indent
         """
-        lowest_indent = self.lowest_indent()
-        nodes = []
+        return self.get_level(self.lowest_indent())
+
+    def get_level(self, indent):
+        """
+            get the nodes at the given indent level, in file order (moved nodes last)
+        """
+        if 0 <= indent < len(self.levels):
+            # Copy the bucket, so the caller can't change it
+            return list(self.levels[indent].live())
+        return []
+
+    def level_sizes(self):
+        """
+            get the number of nodes at each indent level, index 0 is the root level
+        """
+        self.lowest_indent()
+        return [len(bucket) - bucket.holes for bucket in self.levels]
+
+    def add_to_level(self, node):
+        """
+            add node to the levels bucket for its indent
+        """
+        if node.indent == len(self.levels):
+            self.levels.append(level_list([node]))
+        else:
+            self.levels[node.indent].add(node)
+
+    def add_node(self, parent_name, node_name):
+        """
+            Append a new node to the end of the tree, resolving its parent by name
+            The very first node added becomes the root, returns the new node
+        """
+        # The root has no parent, every later node finds its parent by name
+        if self.root == None:
+            parent = None
+        else:
+            parent = self.find_parent(parent_name)
+        return self.insert_node(parent_name, node_name, parent)
+
+    def insert_node(self, parent_name, node_name, parent):
+        """
+            Append a new node under the already resolved parent node (None for a top level node)
+            and update the tree's links and indexes, returns the new node
+        """
+        # Share the parent's name string rather than keeping a duplicate on every child
+        if parent != None:
+            parent_name = parent.node_name
+        # Same for a repeated node_name
+        named = self.name_index.get(node_name)
+        if named:
+            node_name = named.first().node_name
+        # Create new_node: node(parent_name, node_name, parent node link)
+        new_node = node(parent_name, node_name, parent)
+        self.version = self.version + 1
+        # Add new_node to its parent's children
+        if parent != None:
+            if parent.children:
+                parent.children.add(new_node)
+            else:
+                parent.children = child_list([new_node])
+        # The first node is the root, else for last set next to new_node
+        if self.root == None:
+            self.root = new_node
+        else:
+            self.last.next = new_node
+            new_node.prev = self.last
+        self.last = new_node
+        # Add new_node to the bucket for its indent
+        self.add_to_level(new_node)
+        # Add new_node to the name and parent_name indexes
+        if named:
+            named.add(new_node)
+        else:
+            self.name_index[node_name] = name_list([new_node])
+        self.add_index(self.parent_index, parent_name, new_node)
+        return new_node
+
+    def interval_index(self):
+        """
+            return the pre-order interval index (tree_interval.py) for the tree, for O(1) ancestor
+            tests and subtree slices, it is built on first use and rebuilt after any change
+        """
+        if self.intervals == None or self.intervals.version != self.version:
+            # Imported here, the index is optional
+            import tree_interval
+            self.intervals = tree_interval.interval_index(self)
+        return self.intervals
+
+    def name_search(self):
+        """
+            return the name search index (tree_search.py) for prefix, substring and fuzzy
+            node_name lookups, it is built on first use and rebuilt after any change
+        """
+        if self.searcher == None or self.searcher.version != self.version:
+            # Imported here, the index is optional
+            import tree_search
+            self.searcher = tree_search.name_search(self)
+        return self.searcher
+
+    def add_child(self, parent, node_name):
+        """
+            Add a new node named node_name under the parent node (None for a new top level node)
+            The node goes at the end of the file order, returns the new node
+        """
+        if parent == None:
+            return self.insert_node('', node_name, None)
+        return self.insert_node(parent.node_name, node_name, parent)
+
+    def subtree_nodes(self, node):
+        """
+            return node and all of its descendants, each node before its children
+        """
+        nodes = [node]
+        # nodes grows as it is walked, so every child list gets visited
+        for subtree_node in nodes:
+            nodes.extend(live_nodes(subtree_node.children))
+        return nodes
+
+    def delete_subtree(self, node):
+        """
+            Delete node and all of its descendants from the tree
+            Costs time in proportion to the size of the subtree, returns the deleted nodes
+        """
+        nodes = self.subtree_nodes(node)
+        self.version = self.version + 1
+        # Detach the subtree from its parent
+        if node.parent != None:
+            node.parent.children.discard(node)
+        for old_node in nodes:
+            # Unlink old_node from the next chain
+            if old_node.prev != None:
+                old_node.prev.next = old_node.next
+            else:
+                self.root = old_node.next
+            if old_node.next != None:
+                old_node.next.prev = old_node.prev
+            else:
+                self.last = old_node.prev
+            old_node.next = None
+            old_node.prev = None
+            # Drop old_node from the indexes
+            self.remove_index(self.name_index, old_node.node_name, old_node)
+            self.remove_index(self.parent_index, old_node.parent_name, old_node)
+            # And from its levels bucket, indent -1 is in no level
+            self.levels[old_node.indent].discard(old_node)
+            old_node.indent = -1
+        return nodes
+
+    def move_subtree(self, node, new_parent):
+        """
+            Move node and all of its descendants under new_parent (None for a top level node)
+            Indents are updated for the subtree only, its nodes keep their place in file order
+            Costs time in proportion to the size of the subtree (the depth of new_parent for the
+            cycle check)
+        """
+        # A node can't move under itself or its own descendants
+        ancestor = new_parent
+        while ancestor != None:
+            if ancestor == node:
+                raise ValueError('cannot move {} under its own subtree'.format(node.node_name))
+            ancestor = ancestor.parent
+        self.version = self.version + 1
+        # Detach the subtree from its parent
+        if node.parent != None:
+            node.parent.children.discard(node)
+        # And attach it to new_parent
+        if new_parent == None:
+            parent_name = ''
+        else:
+            parent_name = new_parent.node_name
+            if new_parent.children:
+                new_parent.children.add(node)
+            else:
+                new_parent.children = child_list([node])
+        node.parent = new_parent
+        self.remove_index(self.parent_index, node.parent_name, node)
+        node.parent_name = parent_name
+        self.add_index(self.parent_index, parent_name, node)
+        # Update indents and levels buckets, parents before their children
+        if new_parent == None:
+            indent = 0
+        else:
+            indent = new_parent.indent + 1
+        shift = indent - node.indent
+        if shift:
+            for moved_node in self.subtree_nodes(node):
+                self.levels[moved_node.indent].discard(moved_node)
+                moved_node.indent = moved_node.indent + shift
+                self.add_to_level(moved_node)
+
+    def parent_first_nodes(self):
+        """
+            generator of all nodes in file order, except that a node moved under a parent that
+            comes later in the file is held back until just after that parent (and its own held
+            back nodes), so every node comes after its parent
+        """
+        emitted = set()
+        waiting = {}
+        # Start at root
         node = self.root
-        # Iterate from root through last node
         while node:
-            if lowest_indent == node.indent:
-                nodes.append(node)
-            # Point node to next one
+            if node.parent == None or node.parent in emitted:
+                # Emit node, then whatever was waiting on it, depth first
+                ready = [node]
+                while ready:
+                    ready_node = ready.pop()
+                    emitted.add(ready_node)
+                    yield ready_node
+                    ready.extend(reversed(waiting.pop(ready_node, ())))
+            else:
+                waiting.setdefault(node.parent, []).append(node)
+            # Go to next node
             node = node.next
-        return nodes
 
-    def input_tree(self):
+    def rename(self, node, node_name):
+        """
+            Rename node to node_name, its children's parent_name follows
+            For parent resolution by name the renamed node counts as the newest node with node_name
+        """
+        self.version = self.version + 1
+        self.remove_index(self.name_index, node.node_name, node)
+        node.node_name = node_name
+        self.add_index(self.name_index, node_name, node)
+        for child in live_nodes(node.children):
+            self.remove_index(self.parent_index, child.parent_name, child)
+            child.parent_name = node_name
+            self.add_index(self.parent_index, node_name, child)
+
+    def add_index(self, index, name, node):
+        """
+            add node to the index list for name
+        """
+        nodes = index.get(name)
+        if nodes:
+            nodes.add(node)
+        elif index is self.name_index:
+            index[name] = name_list([node])
+        else:
+            index[name] = parent_list([node])
+
+    def remove_index(self, index, name, node):
+        """
+            remove node from the index list for name, dropping the name once it has no nodes
+        """
+        nodes = index[name]
+        nodes.discard(node)
+        if not nodes:
+            del index[name]
+
+    def input_stream(self, lines):
+        """
+            Read the tree from lines, any file-like object or iterator of 'parent|child' lines
+            
+            Lines are consumed one at a time, so only the tree is held in memory, never the raw text.
+            Blank lines are skipped, lines without a '|' are recorded in self.errors as
+            (line_number, message) and the load carries on with the next line
+        """
+        # Link each node in, parents are resolved through name_index
+        for parent_name, node_name in parse_lines(lines, self.errors):
+            self.add_node(parent_name, node_name)
+
+    def write_order(self):
+        """
+            return all nodes in an order that input_stream reads back as the same tree, raises
+            ValueError when there is none
+
+            input_stream resolves a parent_name to the first node read with that name, so besides
+            parents before their children (and siblings, and top level nodes, in their order):
+            the node with children comes first among the nodes sharing its name, and a top level
+            node whose parent_name names a node comes before every node with that name. After
+            renames two nodes with the same name can both have children, or the constraints can
+            go round in a circle, no order of plain lines keeps the tree then.
+            Nodes are otherwise kept in file order.
+        """
+        nodes = list(self.ordered_nodes())
+        position = dict((node, index) for index, node in enumerate(nodes))
+        # Edges of the 'must come before' graph, vertices past the nodes are per name gates
+        after = [[] for node in nodes]
+        waiting = [0] * len(nodes)
+
+        def before(first, second):
+            after[first].append(second)
+            waiting[second] += 1
+
+        def sibling_order(siblings):
+            siblings = list(siblings)
+            for index in range(1, len(siblings)):
+                before(position[siblings[index - 1]], position[siblings[index]])
+
+        sibling_order(self.start_nodes())
+        top_level = {}
+        for node in nodes:
+            if node.parent != None:
+                before(position[node.parent], position[node])
+            elif node.parent_name in self.name_index:
+                top_level.setdefault(node.parent_name, []).append(node)
+            if node.children:
+                sibling_order(live_nodes(node.children))
+        for name, named in self.name_index.items():
+            named = list(named.live())
+            parents = [node for node in named if node.children]
+            if len(parents) > 1:
+                raise ValueError('more than one node named {} has children'.format(name))
+            first = parents or named
+            if parents:
+                for node in named:
+                    if node is not parents[0]:
+                        before(position[parents[0]], position[node])
+            unresolved = top_level.get(name)
+            if unresolved:
+                # A gate vertex, every unresolved node before it and it before the named nodes
+                gate = len(after)
+                after.append([])
+                waiting.append(0)
+                for node in unresolved:
+                    if node.node_name == name:
+                        # Its own name, it comes before the other nodes with it
+                        for other in named:
+                            if other is not node:
+                                before(position[node], position[other])
+                    else:
+                        before(position[node], gate)
+                for node in first:
+                    before(gate, position[node])
+        # Kahn's algorithm, the lowest file position first, gates as soon as they are free
+        ready = [(-1 if vertex >= len(nodes) else vertex, vertex) for vertex in range(len(after)) if not waiting[vertex]]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            vertex = heapq.heappop(ready)[1]
+            if vertex < len(nodes):
+                order.append(nodes[vertex])
+            for next_vertex in after[vertex]:
+                waiting[next_vertex] -= 1
+                if not waiting[next_vertex]:
+                    heapq.heappush(ready, (-1 if next_vertex >= len(nodes) else next_vertex, next_vertex))
+        if len(order) < len(nodes):
+            raise ValueError('nodes sharing names depend on each other\'s order')
+        return order
+
+    def write_data(self, stream, nodes=None):
+        """
+            Write the tree to stream as 'parent|child' lines that input_stream reads back as the
+            same tree (see write_order), raises ValueError before writing anything when the tree
+            can't be written that way. nodes is the write_order when the caller already has it
+        """
+        if nodes == None:
+            nodes = self.write_order()
+        lines = []
+        for node in nodes:
+            lines.append('{}|{}\n'.format(node.parent_name, node.node_name))
+            # Write out a full buffer
+            if len(lines) >= 8192:
+                stream.write(''.join(lines))
+                lines = []
+        stream.write(''.join(lines))
+
+    def input_tree(self, filep=None):
         """
             Read in the input tree, each node is two fields, the parent and child 
+            
+            filep is an optional open file or iterator of lines, by default file_name is read,
+            '-' reads stdin and a name ending in .gz is read through gzip
         """
-        index = 0
-        # read file_name info into lines
-        with open(self.file_name) as filep:
-            lines = filep.readlines()
-        # Iterate each line
-        for line in lines:
-            # Split up each line, strip the parent_name and node_name
-            txt=line.split('|')
-            parent_name = txt[0].strip()
-            node_name = txt[1].strip()
-            # Create a root node
-            if index == 0:
-                # Create root: node(parent_name, node_name, parent), set last to root
-                self.root = node(parent_name, node_name, None)
-                self.last = self.root
-            else:
-                # Find this parent
-                parent = self.find_parent(parent_name)
-                # Create new_node: node(parent_name, node_name, parent node link)
-                new_node = node(parent_name, node_name, parent)
-                # For last set next to new_node
-                self.last.next = new_node
-                self.last = new_node
-            # Increment index
-            index = index + 1
+        # Read from the caller's stream
+        if filep != None:
+            self.input_stream(filep)
+        # '-' is stdin
+        elif self.file_name == '-':
+            self.input_stream(sys.stdin)
+        # Compressed exports are decompressed as they stream
+        elif self.file_name.endswith('.gz'):
+            with gzip.open(self.file_name) as filep:
+                self.input_stream(filep)
+        # read file_name line by line
+        else:
+            with open(self.file_name) as filep:
+                self.input_stream(filep)
                 
     def find(self, name):
         """
             find all nodes with 'name' 
         """
-        ret=[]
-        # Start at root
-        node = self.root
-        while node:
-            # If the name is what we are looking for, add to ret
-            if name == node.node_name:
-                ret.append(node)
-            # Go to next node
-            node=node.next
-        return ret
+        return self.find_node(name)
         
-    def print_tree(self):
+    def print_tree(self, depth_first=False):
         print ('*********************************')
         print ('    DISPLAY TREE')
-        # Start at root
-        node = self.root
-        while node:
-            # initialize ind to ''
-            ind = ''
-            for x in range(node.indent):
-                ind += '-'
-            print ('{}{}'.format(ind,node.node_name))
-            # Go to next node
-            node=node.next
+        sys.stdout.flush()
+        self.write_tree(sys.stdout, depth_first)
+
+    def write_tree(self, stream, depth_first=False, buffer_lines=8192):
+        """
+            write the tree to stream, one node_name per line behind its indent in '-'
+            
+            Lines are joined and written buffer_lines at a time. The default order is file order,
+            depth_first writes each node followed by its subtree (children in file order)
+        """
+        # prefixes[indent] is the '-' prefix for that indent, deeper ones are built as needed
+        prefixes = ['-' * indent for indent in range(min(len(self.levels), PREFIX_CACHE))]
+        lines = []
+        for node in self.ordered_nodes(depth_first):
+            if node.indent < PREFIX_CACHE:
+                lines.append(prefixes[node.indent])
+            else:
+                lines.append('-' * node.indent)
+            lines.append(node.node_name)
+            lines.append('\n')
+            # Write out a full buffer
+            if len(lines) >= buffer_lines * 3:
+                stream.write(''.join(lines))
+                lines = []
+        stream.write(''.join(lines))
+        stream.flush()
+
+    def ordered_nodes(self, depth_first=False):
+        """
+            generator of all nodes, in file order or with depth_first in depth first order
+        """
+        if not depth_first:
+            # Start at root
+            node = self.root
+            while node:
+                yield node
+                # Go to next node
+                node = node.next
+            return
+        for node in self.preorder():
+            yield node
+
+    def start_nodes(self, node=None):
+        """
+            return the nodes a traversal starts from, node or else the top level nodes
+        """
+        if node != None:
+            return [node]
+        # The top level nodes are the indent 0 bucket
+        if not self.levels:
+            return []
+        return self.levels[0].live()
+
+    def preorder(self, node=None):
+        """
+            generator of the subtree at node (the whole tree by default), depth first, each node
+            before its children, children in file order
+        """
+        # Keep a stack of child lists to visit
+        stack = [iter(self.start_nodes(node))]
+        while stack:
+            for node in stack[-1]:
+                yield node
+                if node.children:
+                    stack.append(node.children.live())
+                break
+            else:
+                stack.pop()
+
+    def postorder(self, node=None):
+        """
+            generator of the subtree at node (the whole tree by default), depth first, each node
+            after its children, children in file order
+        """
+        # Each stack entry is a node and what is left of its child list
+        stack = [(None, iter(self.start_nodes(node)))]
+        while stack:
+            for child in stack[-1][1]:
+                stack.append((child, live_nodes(child.children)))
+                break
+            else:
+                node = stack.pop()[0]
+                if node != None:
+                    yield node
+
+    def breadth_first(self, node=None):
+        """
+            generator of the subtree at node (the whole tree by default), a level at a time,
+            each level in the order of its parents
+        """
+        queue = deque(self.start_nodes(node))
+        while queue:
+            node = queue.popleft()
+            yield node
+            queue.extend(live_nodes(node.children))
+
+    def level_nodes(self, indent, node=None):
+        """
+            generator of the nodes at indent, in file order (moved nodes last), or only those in
+            the subtree at node in the order of their parents
+        """
+        if node == None:
+            if 0 <= indent < len(self.levels):
+                for level_node in self.levels[indent].live():
+                    yield level_node
+            return
+        # Depth first, never below indent, meets the nodes at indent left to right
+        stack = [iter([node])]
+        while stack:
+            for level_node in stack[-1]:
+                if level_node.indent == indent:
+                    yield level_node
+                elif level_node.indent < indent and level_node.children:
+                    stack.append(level_node.children.live())
+                break
+            else:
+                stack.pop()
 
 
 def print_nodes(nodes, str):
@@ -229,52 +839,79 @@ def print_nodes(nodes, str):
     else:
         print ('NONE')
 
+def print_errors(errors):
+    """
+        print the malformed input lines skipped while loading, if there were any
+    """
+    if errors:
+        print ('*********************************')
+        print ('    INPUT ERRORS    ')
+        for line_number, message in errors:
+            print ('    LINE {}: {}'.format(line_number, message))
+
 def usage():
-    print ('Usage: %s [-h] [-f FILE]'%sys.argv[0])
+    print ('Usage: %s [-h] [-f FILE] [-s]'%sys.argv[0])
     print ('           -h       Show this message, and exit')
-    print ('           -f FILE  Set the file to FILE')
+    print ('           -f FILE  Set the file to FILE, - reads stdin, FILE.gz is decompressed')
+    print ('           -s       Load FILE through its binary snapshot FILE.snap, rebuilt when FILE is newer')
     print ('\n')
     sys.exit(0)
     
 def command_line_arguments():
     """
-        handle command_line_arguments, return filename
+        handle command_line_arguments, return filename and whether to load through a snapshot
         
         NOTE:
             This should / would use argparse, however to insure it's use under all versions / f
             of Python
     """
-    # Check for a single optional argument, assuming that argparse may not be available
-    if len(sys.argv) > 1:
-        # Check for: -h, -f FILE 
-        if sys.argv[1] == '-h':
-            usage()
+    # Default is data.txt as file name
+    filename = 'data.txt'
+    snapshot = False
+    # Walk the arguments, assuming that argparse may not be available
+    args = sys.argv[1:]
+    while args:
+        arg = args.pop(0)
         # Check for -f FILE, and another argument for filename
-        elif sys.argv[1] == '-f' and len(sys.argv) == 3:
-            filename = sys.argv[2]
-        # Else show usage
+        if arg == '-f' and args:
+            filename = args.pop(0)
+        elif arg == '-s':
+            snapshot = True
+        # Else (including -h) show usage
         else:
             usage()
-    # Default is data.txt as file name
-    else:
-        filename = 'data.txt'
-    return filename
+    return filename, snapshot
     
+def load_tree(filename, snapshot=False):
+    """
+        Create the tree for filename and input it, through the filename.snap snapshot when
+        snapshot is set (stdin and .gz input are always parsed)
+    """
+    if snapshot and filename != '-' and not filename.endswith('.gz'):
+        # Imported here, tree_snapshot itself builds on this module
+        import tree_snapshot
+        compact = tree_snapshot.load_tree(filename)
+        tree_structure = compact.to_tree(filename)
+        tree_structure.errors = compact.errors
+        return tree_structure
+    tree_structure = tree(filename)
+    tree_structure.input_tree()
+    return tree_structure
 
 def main ():
     """
         main function for tree_data.py
     """
     # Process command line arguments and startup
-    filename = command_line_arguments()
+    filename, snapshot = command_line_arguments()
     # Check that it's a valid file
-    if not os.path.isfile(filename):
+    if filename != '-' and not os.path.isfile(filename):
         print ('File {%s} is not valid',Filename)
         sys.exit(0)
 
     # Create the tree and input the tree_structure
-    tree_structure = tree(filename)
-    tree_structure.input_tree()
+    tree_structure = load_tree(filename, snapshot)
+    print_errors(tree_structure.errors)
     
     # Show the tree
     tree_structure.print_tree()
@@ -11,258 +11,172 @@
             
             python tree_data.py [FILE]
         
+        The node and tree classes are shared with tree_data.py, node_name and parent_name lookups
+        for the F and P commands go through the tree's indexes.
+        
+        Batch mode answers a file of queries against the tree loaded once, one JSON line per query:
+        
+            python tree_data_command.py [-f FILE] [-s] -b QUERIES [-c]
+            
+        Each line of QUERIES is a command and its argument, for example 'F HERBS', 'P GREEN', 'L',
+        'N' or 'S SPINACH' (the subtree of SPINACH). QUERIES of - reads stdin, -c answers repeated queries from a cache.
+        'M SPIN' matches node names by prefix, substring or close spelling, ignoring case, each with
+        its path from the top of the tree. F at the prompt falls back to these matches when no node
+        has the exact name.
+        
 """
 
 import sys   
 import os
+import json
 
+from tree_data import print_nodes, print_errors, load_tree
 
-class node():
-    def __init__(self, parent_name, node_name, parent):
-        """
-            Data structure to hold a tree node, which includes:
-                parent_name: Name of parent node
-                node_name:Name of this node
-                parent_link: Link to parent node
-        """
-        # Get node_name, parent_name and parent's link
-        self.node_name = node_name
-        self.parent_name = parent_name
-        self.parent = parent
-        # If the parent is None, this is the root node, so indent is 0
-        if parent == None:
-            self.indent = 0
-        # else: indent=parent indent + 1
-        else:
-            self.indent = parent.indent + 1
-        # Initialize the next link to None
-        self.next = None
-        
-    def show(self):
-        """ show the NODE as parent|node_name """
-        print ('    NODE: {}|{}'.format(self.parent_name,self.node_name))
-        
-    def debug(self):
-        """ debug the NODE with additional info """
-        print ('[{}|{}|{}|{}]'.format(self.node_name,self.parent_name,self.indent,self.next))
-
-class tree():
-    def __init__(self, file_name):
-        """
-            Save the tree file_name and init root, last nodes
-        """
-        self.file_name = file_name
-        self.root = None
-        self.last = None
-        
-    def find_node(self, text):
-        """
-            find node or nodes which have text as the node_name
-        """
-        nodes=[]
-        node = self.root
-        while node:
-            if text == node.node_name:
-                nodes.append(node)
-            # Point node to next one
-            node = node.next
-        return nodes
-
-    def find_parents(self, text):
-        """
-            find one or more parents with text name as parent
-        """
-        nodes = []
-        node = self.root
-        while node:
-            if text == node.parent_name:
-                nodes.append(node)
-            # Point node to next one
-            node = node.next
-        return nodes
+# raw_input was renamed input in Python 3
+try:
+    raw_input
+except NameError:
+    raw_input = input
 
-    def find_parent(self, text):
-        """
-            find a nodes parent name
-        """
-        node = self.root
-        while node:
-            if text == node.node_name:
-                return node
-            # Point node to next one
-            node = node.next
-        return None
 
-    def isnotparent(self, node):
-        # look at all children of node
-        test_node = node.next
-        while test_node:
-            # See whether node is test_node's parent
-            if test_node.parent == node:
-                # Return False, node test_node is a parent
-                return False
-            # link to next test_node
-            test_node = test_node.next
-        return True
-            
-    def get_leaves(self):
-        """
-            find leaves (a node without children)
-            search in self.last ->link
-        """
-        nodes=[]
-        node = self.root.next
-        while node:
-            # See whether this node is NOT a parent
-            if self.isnotparent(node):
-                nodes.append(node)
-            # link to next node
-            node = node.next
-        return nodes
-        
-    def lowest_indent(self):
-        """
-            get the lowest nodes
-        """
-        indent = 0
-        # Start at root
-        node = self.root
-        while node:
-            # If the indent is higher, set to it
-            if node.indent > indent:
-                indent = node.indent
-            # Go to next node
-            node=node.next
-        return indent
-        
-    def get_lowest(self):
-        """
-            get the lowest nodes, based on the indent
-        """
-        lowest_indent = self.lowest_indent()
-        nodes = []
-        node = self.root
-        # Iterate from root through last node
-        while node:
-            if lowest_indent == node.indent:
-                nodes.append(node)
-            # Point node to next one
-            node = node.next
-        return nodes
+def usage():
+    print ('Usage: %s [-h] [-f FILE] [-s] [-b QUERIES [-c]]'%sys.argv[0])
+    print ('           -h          Show this message, and exit')
+    print ('           -f FILE     Set the file to FILE')
+    print ('           -s          Load FILE through its binary snapshot FILE.snap')
+    print ('           -b QUERIES  Answer the queries in QUERIES (- for stdin) as JSON lines, and exit')
+    print ('           -c          With -b, answer repeated queries from a cache')
+    print ('\n')
+    sys.exit(0)
 
-    def input_tree(self):
-        """
-            Read in the input tree, each is two fields, the parent and child 
-        """
-        index = 0
-        # read file_name and parse line by line
-        with open(self.file_name) as filep:
-            lines = filep.readlines()
-        # Iterate each line
-        for line in lines:
-            # Split up each line, strip the parent_name and node_name
-            txt=line.split('|')
-            parent_name = txt[0].strip()
-            node_name = txt[1].strip()
-            # Create a root node
-            if index == 0:
-                # Create root: node(parent_name, node_name, parent)
-                self.root = node(parent_name, node_name, None)
-                self.last = self.root
-            else:
-                # Find this parent
-                parent = self.find_parent(parent_name)
-                # Create new_node: node(parent_name, node_name, parent)
-                new_node = node(parent_name, node_name, parent)
-                self.last.next = new_node
-                self.last = new_node
-            index = index + 1
-                
-    def find(self, name):
-        """
-            find all 'name' nodes
-        """
-        ret=[]
-        # Start at root
-        node = self.root
-        while node:
-            # If the name is what we are looking for, add to ret
-            if name == node.node_name:
-                ret.append(node)
-            # Go to next node
-            node=node.next
-        return ret
-        
-    def print_tree(self):
-        print ('*********************************')
-        print ('    DISPLAY TREE')
-        # Start at root
-        node = self.root
-        while node:
-            # initialize ind to ''
-            ind = ''
-            for x in range(node.indent):
-                ind += '-'
-            print ('{}{}'.format(ind,node.node_name))
-            # Go to next node
-            node=node.next
-        print ('*********************************')
+def command_arguments():
+    """
+        handle command_line_arguments, return filename, whether to load through a snapshot,
+        the batch query file (None when interactive) and whether to cache batch queries
+    """
+    filename = 'data.txt'
+    snapshot = False
+    batch = None
+    cache = False
+    # Walk the arguments, assuming that argparse may not be available
+    args = sys.argv[1:]
+    while args:
+        arg = args.pop(0)
+        # Check for -f FILE and -b QUERIES, each with another argument
+        if arg == '-f' and args:
+            filename = args.pop(0)
+        elif arg == '-b' and args:
+            batch = args.pop(0)
+        elif arg == '-s':
+            snapshot = True
+        elif arg == '-c':
+            cache = True
+        # Else (including -h) show usage
+        else:
+            usage()
+    # stdin can't hold both the tree and the queries
+    if filename == '-' and batch == '-':
+        usage()
+    return filename, snapshot, batch, cache
 
-def print_nodes(nodes, str):
+def node_result(node):
     """
-        print the nodes in the class node
+        a node as a JSON friendly dict
     """
-    print ('*********************************')
-    print ('    {}    '.format(str))
-    if nodes:
-        for node in nodes:
-            node.show()
-    else:
-        print ('NONE')
+    return {'parent': node.parent_name, 'node': node.node_name, 'indent': node.indent}
 
-def usage():
-    print ('Usage: %s [-h] [-f FILE]'%sys.argv[0])
-    print ('           -h       Show this message, and exit')
-    print ('           -f FILE  Set the file to FILE')
-    print ('\n')
-    sys.exit(0)
-    
-def command_line_arguments():
+def run_query(tree_structure, command, arg):
     """
-        handle command_line_arguments, return filename
-        
-        NOTE:
-            This should / would use argparse, however to insure it's use under all versions
-            of Pythons
+        answer one query, command is one of F, P, L, N, S or M and arg is the name for F, P, S and M
+        returns a JSON friendly dict with the matching nodes, or an error
+        S is the subtree of the first node named arg, depth first
+        M is the nodes whose names match arg (tree_search.py), each with its path
     """
-    # Check for a single optional argument, assuming that argparse may not be available
-    if len(sys.argv) > 1:
-        # Check for: -h, -f FILE 
-        if sys.argv[1] == '-h':
-            usage()
-        elif sys.argv[1] == '-f' and len(sys.argv) == 3:
-            filename = sys.argv[2]
+    if command == 'F':
+        nodes = tree_structure.find_node(arg)
+    elif command == 'P':
+        nodes = tree_structure.find_parents(arg)
+    elif command == 'L':
+        nodes = tree_structure.get_leaves()
+    elif command == 'N':
+        nodes = tree_structure.get_lowest()
+    elif command == 'S':
+        node = tree_structure.find_parent(arg)
+        if node == None:
+            nodes = []
         else:
-            usage()
+            nodes = tree_structure.interval_index().subtree(node)
+    elif command == 'M':
+        searcher = tree_structure.name_search()
+        matches = searcher.matches(searcher.search(arg))
+        results = []
+        for node, path in matches:
+            result = node_result(node)
+            result['path'] = path
+            results.append(result)
+        return {'command': command, 'arg': arg, 'count': len(results), 'nodes': results}
     else:
-        filename = 'data.txt'
-    return filename
-    
+        return {'command': command, 'arg': arg, 'error': 'unknown command'}
+    return {'command': command, 'arg': arg, 'count': len(nodes), 'nodes': [node_result(node) for node in nodes]}
+
+def parse_query(line):
+    """
+        split a query line into its upper case command and its argument
+    """
+    txt = line.strip().split(None, 1)
+    if not txt:
+        return None, ''
+    if len(txt) == 1:
+        return txt[0].upper(), ''
+    return txt[0].upper(), txt[1].strip()
+
+def run_batch(tree_structure, queries, output, cache=False):
+    """
+        answer every query line in queries, writing one JSON line to output per query
+        With cache, a repeated query is answered from the JSON of its first answer
+    """
+    answers = {}
+    for line in queries:
+        # Skip blank lines
+        command, arg = parse_query(line)
+        if command == None:
+            continue
+        key = (command, arg)
+        text = answers.get(key)
+        if text == None:
+            text = json.dumps(run_query(tree_structure, command, arg), sort_keys=True)
+            if cache:
+                answers[key] = text
+        output.write(text)
+        output.write('\n')
+    output.flush()
+
 
 def main ():
     """
         main function for tree_data.py
     """
     # Process command line arguments and startup
-    filename = command_line_arguments()
+    filename, snapshot, batch, cache = command_arguments()
     # Check that it's a valid file
-    if not os.path.isfile(filename):
+    if filename != '-' and not os.path.isfile(filename):
         print ('File {%s} is not valid',Filename)
         sys.exit(0)
 
     # Create the tree and input from filename into tree_struct
-    tree_structure = tree(filename)
-    tree_structure.input_tree()
+    tree_structure = load_tree(filename, snapshot)
+    # Batch mode, answer the queries and exit
+    if batch != None:
+        # Report input errors on stderr, stdout only holds the answers
+        for line_number, message in tree_structure.errors:
+            sys.stderr.write('LINE {}: {}\n'.format(line_number, message))
+        if batch == '-':
+            run_batch(tree_structure, sys.stdin, sys.stdout, cache)
+        else:
+            with open(batch) as queries:
+                run_batch(tree_structure, queries, sys.stdout, cache)
+        sys.exit(0)
+    print_errors(tree_structure.errors)
     # Mode is 0 for abreviation, 1 for verbose
     mode = 2
     while mode != 'E':
@@ -287,6 +201,7 @@ def main ():
         elif input == 'T':
             # print_tree
             tree_structure.print_tree()
+            print ('*********************************')
         elif input == 'L':
             # Retreive all leaves, the nodes which have no children
             nodes = tree_structure.get_leaves()
@@ -298,6 +213,15 @@ def main ():
         elif input == 'F':
             nodename=raw_input('Enter node to find --> ')
             nodes = tree_structure.find_node(nodename)
+            if not nodes and nodename.strip():
+                # No exact match, show close matches with their paths
+                searcher = tree_structure.name_search()
+                matches = searcher.matches(searcher.search(nodename))
+                if matches:
+                    print ('{} not found, did you mean'.format(nodename))
+                    for node, path in matches:
+                        print ('    ' + ' > '.join(path))
+                    continue
             print_nodes(nodes, 'FIND_NODE')
         elif input == 'P':
             parentname=raw_input('Enter parent to find --> ')
@@ -0,0 +1,60 @@
+"""
+    tree_interval.py
+
+    Notes:
+        Pre-order interval labels for the tree in tree_data.py. Walking the tree depth first, each
+        node gets its position in the walk (start) and the position just past its last descendant
+        (end), so:
+
+            b is under a         start[a] <= start[b] < end[a]
+            subtree of a         order[start[a]:end[a]]
+            size of a's subtree  end[a] - start[a]
+
+        Use tree.interval_index() rather than building one directly, the tree keeps the index and
+        builds a new one the first time it is asked for after a change.
+"""
+
+# Standard library imports
+from array import array
+
+
+class interval_index(object):
+    def __init__(self, tree_structure):
+        """
+            Label every node of tree_structure, taking a note of its version
+        """
+        self.version = tree_structure.version
+        # The depth first walk, each node followed by its subtree
+        self.order = list(tree_structure.ordered_nodes(True))
+        self.start = {}
+        for position, node in enumerate(self.order):
+            self.start[node] = position
+        # A node's end is its start plus its subtree size, sizes come up from the bottom
+        size = array('l', [1]) * len(self.order)
+        start = self.start
+        for position in range(len(self.order) - 1, -1, -1):
+            parent = self.order[position].parent
+            if parent != None:
+                size[start[parent]] += size[position]
+        self.end = array('l', [position + size[position] for position in range(len(self.order))])
+
+    def is_ancestor(self, ancestor, node):
+        """
+            return whether node is in ancestor's subtree (a node counts as its own ancestor)
+        """
+        position = self.start[ancestor]
+        return position <= self.start[node] < self.end[position]
+
+    def subtree(self, node):
+        """
+            return node and its descendants, in depth first order
+        """
+        position = self.start[node]
+        return self.order[position:self.end[position]]
+
+    def subtree_size(self, node):
+        """
+            return the number of nodes in node's subtree, node included
+        """
+        position = self.start[node]
+        return self.end[position] - position
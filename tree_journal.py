@@ -0,0 +1,240 @@
+"""
+    tree_journal.py
+
+    Notes:
+        Append-only journal of tree changes kept next to the 'parent|child' data file, so an edit
+        costs one appended line instead of rewriting the whole file. The journal (FILE.journal by
+        default) holds one record per line, names are resolved to the first node with that name,
+        the same way a data line's parent_name is:
+
+            B|size|mtime          the base data file the journal applies to, always the first line
+            A|parent_name|name    add a node, exactly like the data line parent_name|name
+            D|name                delete the node and its subtree
+            M|name|parent_name    move the node and its subtree under parent_name ('' for top level)
+            R|name|new_name       rename the node
+
+        load_tree() reads the base file and replays its journal. compact() folds the journal into
+        a fresh base file (and optionally its snapshot) and removes the journal. A journal whose
+        B record doesn't match the base file was already folded in (or the base file was changed
+        behind its back), it is ignored and renamed to FILE.journal.stale, so new records start a
+        fresh journal instead of landing behind the old B record.
+
+        A tree with two same named nodes that both have children can't be written as plain lines,
+        compact() raises ValueError and leaves the base file and journal as they were.
+        Names can't hold '|' or a line break, add, move and rename raise ValueError for them.
+        delete, move and rename raise KeyError for a name no node has, move to '' is the top level.
+"""
+
+# Standard library imports
+import os
+
+from tree_data import load_tree as load_data, replace_file, replaced_file
+
+
+def journal_name(file_name):
+    """ the default journal file name for the data file file_name """
+    return file_name + '.journal'
+
+
+def stale_name(journal_file):
+    """ the name a journal that doesn't match its base file is moved to """
+    return journal_file + '.stale'
+
+
+def retire(journal_file):
+    """
+        move journal_file out of the way, replacing an older stale journal
+    """
+    replace_file(journal_file, stale_name(journal_file))
+
+
+def matches_base(journal_file, file_name):
+    """
+        whether journal_file is empty or its B record matches the data file file_name
+    """
+    with open(journal_file) as filep:
+        first_line = filep.readline()
+    return not first_line or first_line.rstrip('\n') == 'B|{}'.format(base_stamp(file_name))
+
+
+def check_name(node_name):
+    """
+        raise ValueError for a name that can't be written to a journal or data line
+    """
+    if '|' in node_name or '\n' in node_name or '\r' in node_name:
+        raise ValueError('names cannot hold | or line breaks: {!r}'.format(node_name))
+
+
+def base_stamp(file_name):
+    """
+        the B record fields that identify the current contents of the data file file_name
+    """
+    info = os.stat(file_name)
+    return '{}|{}'.format(info.st_size, int(info.st_mtime * 1000000))
+
+
+class journal(object):
+    def __init__(self, tree_structure, journal_file=None, sync=True):
+        """
+            Journal for tree_structure, which was loaded from tree_structure.file_name
+            Every change is applied to the tree and appended to journal_file, with sync each
+            record is flushed to disk before the call returns
+        """
+        self.tree = tree_structure
+        if journal_file == None:
+            journal_file = journal_name(tree_structure.file_name)
+        self.journal_file = journal_file
+        self.sync = sync
+        self.filep = None
+
+    def append(self, *fields):
+        """
+            append one record to the journal, starting a new journal with its B record
+        """
+        if self.filep == None:
+            # New records behind a stale B record would never be replayed
+            if os.path.isfile(self.journal_file) and not matches_base(self.journal_file, self.tree.file_name):
+                retire(self.journal_file)
+            self.filep = open(self.journal_file, 'a')
+            if self.filep.tell() == 0:
+                self.filep.write('B|{}\n'.format(base_stamp(self.tree.file_name)))
+        self.filep.write('|'.join(fields) + '\n')
+        self.filep.flush()
+        if self.sync:
+            os.fsync(self.filep.fileno())
+
+    def add(self, parent_name, node_name):
+        """ add node_name under the first node named parent_name, returns the new node """
+        check_name(parent_name)
+        check_name(node_name)
+        new_node = self.tree.add_node(parent_name, node_name)
+        self.append('A', parent_name, node_name)
+        return new_node
+
+    def delete(self, node_name):
+        """ delete the first node named node_name and its subtree """
+        self.tree.delete_subtree(find_node(self.tree, node_name))
+        self.append('D', node_name)
+
+    def move(self, node_name, parent_name):
+        """ move the first node named node_name under the first node named parent_name """
+        check_name(parent_name)
+        self.tree.move_subtree(find_node(self.tree, node_name), find_new_parent(self.tree, parent_name))
+        self.append('M', node_name, parent_name)
+
+    def rename(self, node_name, new_name):
+        """ rename the first node named node_name to new_name """
+        check_name(new_name)
+        self.tree.rename(find_node(self.tree, node_name), new_name)
+        self.append('R', node_name, new_name)
+
+    def compact(self, snapshot=False):
+        """ fold this journal into the data file, see compact() """
+        self.close()
+        compact(self.tree, self.journal_file, snapshot)
+
+    def close(self):
+        if self.filep != None:
+            self.filep.close()
+            self.filep = None
+
+
+def replay(tree_structure, journal_file=None):
+    """
+        Apply the records of journal_file to tree_structure, returns the number applied
+        Records that don't parse or name a missing node are added to tree_structure.errors
+        A journal whose B record doesn't match the base file is retired (see retire) unread
+    """
+    if journal_file == None:
+        journal_file = journal_name(tree_structure.file_name)
+    if not os.path.isfile(journal_file):
+        return 0
+    if not matches_base(journal_file, tree_structure.file_name):
+        # A journal for another base was already folded into this one
+        retire(journal_file)
+        return 0
+    applied = 0
+    with open(journal_file) as filep:
+        line_number = 0
+        for line in filep:
+            line_number = line_number + 1
+            txt = line.rstrip('\n').split('|')
+            op = txt[0]
+            # The B record, checked by matches_base
+            if line_number == 1:
+                continue
+            try:
+                if op == 'A' and len(txt) == 3:
+                    tree_structure.add_node(txt[1], txt[2])
+                elif op == 'D' and len(txt) == 2:
+                    tree_structure.delete_subtree(find_node(tree_structure, txt[1]))
+                elif op == 'M' and len(txt) == 3:
+                    tree_structure.move_subtree(find_node(tree_structure, txt[1]), find_new_parent(tree_structure, txt[2]))
+                elif op == 'R' and len(txt) == 3:
+                    tree_structure.rename(find_node(tree_structure, txt[1]), txt[2])
+                else:
+                    raise ValueError('bad journal record: {}'.format(line.strip()))
+            except (KeyError, ValueError) as error:
+                tree_structure.errors.append((line_number, 'journal: {}'.format(error)))
+                continue
+            applied = applied + 1
+    return applied
+
+
+def find_node(tree_structure, node_name):
+    """
+        the first node named node_name, KeyError when there is none
+    """
+    node = tree_structure.find_parent(node_name)
+    if node == None:
+        raise KeyError('no node named {}'.format(node_name))
+    return node
+
+
+def find_new_parent(tree_structure, parent_name):
+    """
+        the node a move puts its subtree under: None (top level) for '', else the first node
+        named parent_name, KeyError when there is none
+    """
+    if parent_name == '':
+        return None
+    return find_node(tree_structure, parent_name)
+
+
+def load_tree(file_name, journal_file=None, snapshot=False):
+    """
+        Load the data file file_name (through its snapshot with snapshot) and replay its journal,
+        returns the tree
+    """
+    tree_structure = load_data(file_name, snapshot)
+    replay(tree_structure, journal_file)
+    return tree_structure
+
+
+def compact(tree_structure, journal_file=None, snapshot=False):
+    """
+        Fold the journal into a fresh data file at tree_structure.file_name, then remove the journal
+        With snapshot, the binary snapshot (tree_snapshot.py) is rewritten as well
+
+        The new data file is written next to the old one and renamed over it (see
+        tree_data.replaced_file), a crash before the rename leaves the old file and its journal,
+        a crash after it leaves a journal whose B record no longer matches, so it is never
+        replayed twice
+        Raises ValueError, leaving the data file and journal alone, when the tree can't be
+        written as 'parent|child' lines (see tree.write_order)
+    """
+    file_name = tree_structure.file_name
+    if journal_file == None:
+        journal_file = journal_name(file_name)
+    # Raises ValueError before anything is written
+    nodes = tree_structure.write_order()
+    with replaced_file(file_name) as filep:
+        tree_structure.write_data(filep, nodes)
+    if snapshot:
+        # Imported here, only needed when a snapshot is kept
+        import tree_snapshot
+        import tree_compact
+        # In the order of the new data file, so both load as the same tree
+        tree_snapshot.save(tree_compact.from_tree(tree_structure, nodes), tree_snapshot.snapshot_name(file_name))
+    if os.path.exists(journal_file):
+        os.remove(journal_file)
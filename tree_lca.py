@@ -0,0 +1,137 @@
+"""
+    tree_lca.py
+
+    Notes:
+        Lowest common ancestor (LCA), path and distance queries over the tree in tree_data.py,
+        by binary lifting on top of the interval index (tree_interval.py).
+
+        Nodes are numbered by their position in the depth first walk, so "a is an ancestor of b"
+        is a <= b < end[a]. up[k][i] is the 2**k-th ancestor of node i (a top level node is its
+        own ancestor), an LCA query climbs from one node in at most log2(depth) jumps.
+
+        Nodes in different top level trees (the root and any node whose parent was never found)
+        have no common ancestor, lca() returns None and distance() returns None for them.
+"""
+
+# Standard library imports
+from array import array
+
+
+class lca_engine(object):
+    def __init__(self, tree_structure):
+        """
+            LCA engine for tree_structure, the tables are built now and again after the tree changes
+        """
+        self.tree = tree_structure
+        self.version = None
+        self.build()
+
+    def build(self):
+        """
+            build the jump tables from the tree's interval index
+        """
+        index = self.tree.interval_index()
+        self.version = self.tree.version
+        self.start = index.start
+        self.order = index.order
+        self.end = index.end
+        # up[0] is the parent of each node, by position
+        start = self.start
+        parent = array('l', range(len(self.order)))
+        depth = 0
+        for position, node in enumerate(self.order):
+            if node.parent != None:
+                parent[position] = start[node.parent]
+            if node.indent > depth:
+                depth = node.indent
+        self.up = [parent]
+        # One more table for each power of 2 up to the deepest node
+        while (1 << len(self.up)) <= depth:
+            last = self.up[-1]
+            self.up.append(array('l', [last[jump] for jump in last]))
+
+    def refresh(self):
+        """
+            rebuild the tables when the tree has changed since they were built
+        """
+        if self.version != self.tree.version:
+            self.build()
+
+    def lca_position(self, a, b):
+        """
+            the LCA of the nodes at walk positions a and b, as a position, or -1
+        """
+        end = self.end
+        # a is already an ancestor of b
+        if a <= b < end[a]:
+            return a
+        # Climb from a while the jump lands below the common ancestor
+        for up in reversed(self.up):
+            jump = up[a]
+            if not jump <= b < end[jump]:
+                a = jump
+        a = self.up[0][a]
+        if a <= b < end[a]:
+            return a
+        return -1
+
+    def lca(self, a, b):
+        """
+            return the lowest common ancestor of nodes a and b, None when they are in different trees
+        """
+        self.refresh()
+        position = self.lca_position(self.start[a], self.start[b])
+        if position == -1:
+            return None
+        return self.order[position]
+
+    def lca_many(self, pairs):
+        """
+            return the lca() of every (a, b) node pair in pairs, as a list
+        """
+        self.refresh()
+        start = self.start
+        order = self.order
+        lca_position = self.lca_position
+        results = []
+        for a, b in pairs:
+            position = lca_position(start[a], start[b])
+            if position == -1:
+                results.append(None)
+            else:
+                results.append(order[position])
+        return results
+
+    def distance(self, a, b):
+        """
+            return the number of edges between nodes a and b, None when they are in different trees
+        """
+        ancestor = self.lca(a, b)
+        if ancestor == None:
+            return None
+        return a.indent + b.indent - 2 * ancestor.indent
+
+    def distance_many(self, pairs):
+        """
+            return the distance() of every (a, b) node pair in pairs, as a list
+        """
+        pairs = list(pairs)
+        results = []
+        for (a, b), ancestor in zip(pairs, self.lca_many(pairs)):
+            if ancestor == None:
+                results.append(None)
+            else:
+                results.append(a.indent + b.indent - 2 * ancestor.indent)
+        return results
+
+
+def path(node):
+    """
+        return the nodes from the top of node's tree down to node
+    """
+    nodes = []
+    while node != None:
+        nodes.append(node)
+        node = node.parent
+    nodes.reverse()
+    return nodes
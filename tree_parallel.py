@@ -0,0 +1,165 @@
+"""
+    tree_parallel.py
+
+    usage:
+        python tree_parallel.py [-w WORKERS] FILE
+
+    Notes:
+        Parallel loader for big 'parent|child' files, the result is the compact_tree
+        (tree_compact.py) that the sequential loader builds, node for node.
+
+        The file is cut into byte ranges that each end on a line break, worker processes read
+        and parse their ranges and intern the names they see, handing back a small name table
+        and the pairs as name ids. The merge then takes the ranges in file order, maps each
+        table onto the global one and resolves parents (first node with the name wins), which
+        has to be sequential, but is only array and dict work by then.
+
+        Only plain files can be split, stdin ('-') and .gz files are read by the sequential
+        loader (compact_tree.input_tree) in this process.
+"""
+
+# Standard library imports
+import sys
+import os
+import io
+import time
+import multiprocessing
+from array import array
+
+from tree_data import parse_lines
+from tree_compact import compact_tree, ID_TYPE
+
+# Ranges per worker, several smaller ranges keep the workers busy and the memory per range low
+RANGES_PER_WORKER = 4
+# Files smaller than this are parsed in this process
+MIN_PARALLEL_SIZE = 1 << 20
+
+
+def split_ranges(file_name, parts):
+    """
+        return up to parts (start, end) byte ranges covering file_name, each ending just after a
+        line break (or at the end of the file)
+    """
+    size = os.path.getsize(file_name)
+    bounds = [0]
+    with open(file_name, 'rb') as filep:
+        for part in range(1, parts):
+            offset = size * part // parts
+            if offset <= bounds[-1]:
+                continue
+            # Move up to the start of the next line
+            filep.seek(offset - 1)
+            filep.readline()
+            offset = filep.tell()
+            if offset >= size:
+                break
+            if offset > bounds[-1]:
+                bounds.append(offset)
+    bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+
+def parse_range(args):
+    """
+        Worker: parse the lines in one byte range of a file
+        returns the range's name table, its (parent, node) name id pairs as an array, its number
+        of lines and its errors, line numbers counted from the start of the range
+    """
+    file_name, start, end = args
+    with open(file_name, 'rb') as filep:
+        filep.seek(start)
+        data = filep.read(end - start)
+    # Same line breaks as reading the file in text mode
+    text = io.StringIO(data.decode('utf-8'), newline=None)
+    names = []
+    name_ids = {}
+    pairs = array(ID_TYPE)
+    errors = []
+    for parent_name, node_name in parse_lines(text, errors):
+        for name in (parent_name, node_name):
+            name_id = name_ids.get(name)
+            if name_id == None:
+                name_id = len(names)
+                names.append(name)
+                name_ids[name] = name_id
+            pairs.append(name_id)
+    # Count the lines, the last one may have no line break
+    text.seek(0)
+    line_count = 0
+    for line in text:
+        line_count = line_count + 1
+    return names, pairs, line_count, errors
+
+
+def merge_range(compact, result, line_offset):
+    """
+        Add one parsed range to compact, in order, returns the number of lines it covered
+    """
+    names, pairs, line_count, errors = result
+    # Local name ids to global ones
+    global_ids = [compact.name_id(name) for name in names]
+    add_ids = compact.add_ids
+    for i in range(0, len(pairs), 2):
+        add_ids(global_ids[pairs[i]], global_ids[pairs[i + 1]])
+    for line_number, message in errors:
+        compact.errors.append((line_number + line_offset, message))
+    return line_count
+
+
+def load_parallel(file_name, workers=None):
+    """
+        Load the 'parent|child' file file_name with worker processes, returns a compact_tree
+        identical to compact_tree.input_tree(file_name), errors and their line numbers included
+    """
+    if workers == None:
+        workers = multiprocessing.cpu_count()
+    compact = compact_tree()
+    # Not worth a process pool, or can't be split
+    if workers < 2 or file_name == '-' or file_name.endswith('.gz') or os.path.getsize(file_name) < MIN_PARALLEL_SIZE:
+        compact.input_tree(file_name)
+        return compact
+    ranges = split_ranges(file_name, workers * RANGES_PER_WORKER)
+    pool = multiprocessing.Pool(workers)
+    try:
+        line_offset = 0
+        # imap hands results back in file order, merging starts while later ranges are parsed
+        for result in pool.imap(parse_range, [(file_name, start, end) for start, end in ranges]):
+            line_offset = line_offset + merge_range(compact, result, line_offset)
+    finally:
+        pool.close()
+        pool.join()
+    return compact
+
+
+def usage():
+    print ('Usage: %s [-h] [-w WORKERS] FILE'%sys.argv[0])
+    print ('           -h          Show this message, and exit')
+    print ('           -w WORKERS  Number of worker processes, all CPUs by default')
+    print ('\n')
+    sys.exit(0)
+
+
+def main():
+    """
+        main function for tree_parallel.py, loads FILE and reports the time taken
+    """
+    workers = None
+    file_name = None
+    args = sys.argv[1:]
+    while args:
+        arg = args.pop(0)
+        if arg == '-w' and args:
+            workers = int(args.pop(0))
+        elif (arg == '-' or not arg.startswith('-')) and file_name == None:
+            file_name = arg
+        else:
+            usage()
+    if file_name == None or (file_name != '-' and not os.path.isfile(file_name)):
+        usage()
+    start = time.time()
+    compact = load_parallel(file_name, workers)
+    print ('{} nodes, {} names, {} errors in {:.3f} s'.format(len(compact), len(compact.names), len(compact.errors), time.time() - start))
+
+
+if __name__ == '__main__':
+    main()
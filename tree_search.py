@@ -0,0 +1,181 @@
+"""
+    tree_search.py
+
+    Notes:
+        Partial and inexact node_name search for the tree in tree_data.py. Matching ignores case,
+        the indexes are built once over the distinct names:
+
+            prefix:    sorted lower case names, a binary search finds the first match and the
+                       matches follow it
+            substring: index of every 1, 2 and 3 character gram, a text of up to 3 characters
+                       reads its own posting list, a longer one checks the names on the
+                       shortest posting list of its trigrams
+            fuzzy:     trie of the lower case names, walked with one edit distance row per trie
+                       node, branches already further than max_distance away are skipped
+
+        Answers take time in proportion to the matches (and, for fuzzy, the trie nodes within
+        reach), not to the tree. Use tree.name_search() rather than building one directly, the
+        tree keeps the index and builds a new one the first time it is asked for after a change.
+"""
+
+# Standard library imports
+from bisect import bisect_left
+
+from tree_data import live_nodes
+
+# Trie key holding the lower case name that ends at a trie node
+END = None
+
+
+def lower(name):
+    """ the case insensitive form of name """
+    return name.lower()
+
+
+class name_search(object):
+    def __init__(self, tree_structure):
+        """
+            Index the distinct node_names of tree_structure, taking a note of its version
+        """
+        self.tree = tree_structure
+        self.version = tree_structure.version
+        # Lower case name to the node_names with that lower case form
+        self.names = {}
+        for name in tree_structure.name_index:
+            self.names.setdefault(lower(name), []).append(name)
+        self.sorted_names = sorted(self.names)
+        self.grams = {}
+        self.trie = {}
+        for key in self.sorted_names:
+            for size in (1, 2, 3):
+                for i in range(len(key) - size + 1):
+                    postings = self.grams.setdefault(key[i:i + size], [])
+                    # A name repeating a gram is posted once
+                    if not postings or postings[-1] != key:
+                        postings.append(key)
+            trie_node = self.trie
+            for char in key:
+                trie_node = trie_node.setdefault(char, {})
+            trie_node[END] = key
+
+    def original(self, keys, limit=None):
+        """
+            return the node_names for lower case keys, at most limit of them
+        """
+        names = []
+        for key in keys:
+            names.extend(self.names[key])
+            if limit != None and len(names) >= limit:
+                return names[:limit]
+        return names
+
+    def exact(self, text):
+        """
+            return the node_names equal to text, ignoring case
+        """
+        return list(self.names.get(lower(text), ()))
+
+    def prefix(self, text, limit=None):
+        """
+            return the node_names starting with text, ignoring case, in sorted order
+        """
+        text = lower(text)
+        keys = []
+        position = bisect_left(self.sorted_names, text)
+        while position < len(self.sorted_names) and self.sorted_names[position].startswith(text):
+            keys.append(self.sorted_names[position])
+            if limit != None and len(keys) >= limit:
+                break
+            position = position + 1
+        return self.original(keys, limit)
+
+    def substring(self, text, limit=None):
+        """
+            return the node_names containing text, ignoring case, in sorted order
+        """
+        text = lower(text)
+        if not text:
+            # Every name holds it
+            candidates = self.sorted_names
+        elif len(text) <= 3:
+            # Every name on the posting list holds text
+            candidates = self.grams.get(text, ())
+        else:
+            # The shortest posting list holding each trigram of text bounds the candidates
+            postings = []
+            for i in range(len(text) - 2):
+                posting = self.grams.get(text[i:i + 3])
+                if not posting:
+                    return []
+                postings.append(posting)
+            candidates = min(postings, key=len)
+        keys = []
+        for key in candidates:
+            if text in key:
+                keys.append(key)
+                if limit != None and len(keys) >= limit:
+                    break
+        return self.original(keys, limit)
+
+    def fuzzy(self, text, max_distance=1, limit=None):
+        """
+            return the node_names within max_distance edits (insert, delete or change a character)
+            of text, ignoring case, closest first
+        """
+        text = lower(text)
+        first_row = list(range(len(text) + 1))
+        found = []
+        # Walk the trie, each entry carries the edit distance row of the path so far
+        stack = [(self.trie, first_row)]
+        while stack:
+            trie_node, row = stack.pop()
+            if END in trie_node and row[-1] <= max_distance:
+                found.append((row[-1], trie_node[END]))
+            for char, child in trie_node.items():
+                if char == END:
+                    continue
+                next_row = [row[0] + 1]
+                for i in range(1, len(text) + 1):
+                    if text[i - 1] == char:
+                        change = row[i - 1]
+                    else:
+                        change = row[i - 1] + 1
+                    next_row.append(min(next_row[i - 1] + 1, row[i] + 1, change))
+                # Longer paths only get further away, drop the branch
+                if min(next_row) <= max_distance:
+                    stack.append((child, next_row))
+        found.sort()
+        return self.original([key for distance, key in found], limit)
+
+    def search(self, text, max_distance=1, limit=20):
+        """
+            return up to limit node_names matching text, best matches first: same name ignoring
+            case, then names starting with text, containing it, and within max_distance edits
+        """
+        names = []
+        seen = set()
+        for found in (self.exact(text), self.prefix(text, limit), self.substring(text, limit), self.fuzzy(text, max_distance, limit)):
+            for name in found:
+                if name not in seen:
+                    seen.add(name)
+                    names.append(name)
+                    if len(names) >= limit:
+                        return names
+        return names
+
+    def matches(self, names):
+        """
+            return (node, path) for every node named in names, path is the list of node_names
+            from the top of the tree down to the node
+        """
+        results = []
+        for name in names:
+            for node in live_nodes(self.tree.name_index.get(name)):
+                path = []
+                ancestor = node
+                while ancestor != None:
+                    path.append(ancestor.node_name)
+                    ancestor = ancestor.parent
+                path.reverse()
+                results.append((node, path))
+        return results
@@ -0,0 +1,239 @@
+"""
+    tree_server.py
+
+    usage:
+        python tree_server.py [-h] [-f FILE] [-s] [-c SIZE] [-p PORT | -u PATH]
+
+    Notes:
+        Long lived local query service for the tree in tree_data.py. The tree is loaded once and
+        shared by every client (tree_concurrent.versioned_tree), connections are served by an
+        asyncio event loop on 127.0.0.1:PORT, or on the Unix socket PATH.
+
+        The protocol is line based, each request is one query line as in tree_data_command.py
+        batch mode ('F HERBS', 'P GREEN', 'L', 'N', 'S SPINACH', 'M SPIN') and each answer is one JSON line.
+        Answers come back in request order, so a client can keep a connection open and send
+        many requests before reading (pipelining). Two more requests:
+
+            STATS   per command counts and latencies (seconds) since the server started, the
+                    generation of the published tree (how many times it was replaced) and the
+                    query cache hits and misses when the server runs with -c
+            QUIT    close the connection
+
+        A request line over REQUEST_LIMIT bytes, or one that isn't UTF-8, gets an error answer
+        like any other bad request, the connection carries on with the next line.
+
+        Queries run on the event loop, one at a time, a huge L or N answer holds up the others
+        while it is built.
+
+        asyncio needs Python 3.
+"""
+
+# Standard library imports
+import sys
+import os
+import json
+import time
+import asyncio
+
+from tree_data import load_tree
+from tree_concurrent import versioned_tree
+from tree_data_command import parse_query, run_query
+from tree_client import DEFAULT_PORT
+
+# Longest request line read, the StreamReader buffer limit
+REQUEST_LIMIT = 2**16
+
+
+class latency_counters(object):
+    def __init__(self):
+        """
+            Count, total and worst time per command
+        """
+        self.counters = {}
+
+    def add(self, command, seconds):
+        counter = self.counters.get(command)
+        if counter == None:
+            counter = self.counters[command] = [0, 0.0, 0.0]
+        counter[0] += 1
+        counter[1] += seconds
+        if seconds > counter[2]:
+            counter[2] = seconds
+
+    def report(self):
+        """
+            return the counters as a JSON friendly dict
+        """
+        report = {}
+        for command, (count, total, worst) in self.counters.items():
+            report[command] = {'count': count, 'total': total, 'mean': total / count, 'max': worst}
+        return report
+
+
+def error_answer(message):
+    """
+        return the JSON line answering a request that isn't a query
+    """
+    return json.dumps({'command': '', 'arg': '', 'error': message})
+
+
+async def skip_line(reader, consumed):
+    """
+        drop the rest of a request line over the limit, consumed of its bytes are buffered
+    """
+    while True:
+        await reader.readexactly(consumed)
+        try:
+            # The line break is within the limit of what is left, or the overrun comes round again
+            await reader.readuntil(b'\n')
+            return
+        except asyncio.LimitOverrunError as error:
+            consumed = error.consumed
+
+
+class tree_server(object):
+    def __init__(self, shared):
+        """
+            Serve queries against shared, a tree_concurrent.versioned_tree
+        """
+        self.shared = shared
+        self.stats = latency_counters()
+        self.connections = 0
+
+    def answer(self, line):
+        """
+            return the JSON line answering one request line, None to close the connection
+        """
+        command, arg = parse_query(line)
+        if command == 'QUIT':
+            return None
+        if command == 'STATS':
+            report = {'command': 'STATS', 'connections': self.connections, 'generation': self.shared.generation,
+                      'stats': self.stats.report()}
+            cache = self.shared.snapshot().cache
+            if cache != None:
+                report['cache'] = cache.stats()
+            return json.dumps(report, sort_keys=True)
+        if command == None:
+            return error_answer('empty request')
+        start = time.time()
+        # One snapshot per request, never a half published tree
+        result = run_query(self.shared.snapshot(), command, arg)
+        text = json.dumps(result, sort_keys=True)
+        self.stats.add(command, time.time() - start)
+        return text
+
+    async def handle(self, reader, writer):
+        """
+            serve one connection until the client closes it or sends QUIT
+        """
+        self.connections = self.connections + 1
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except asyncio.IncompleteReadError as error:
+                    # The last line, without its line break
+                    line = error.partial
+                    if not line:
+                        break
+                except asyncio.LimitOverrunError as error:
+                    await skip_line(reader, error.consumed)
+                    line = None
+                if line == None:
+                    text = error_answer('request line over {} bytes'.format(REQUEST_LIMIT))
+                else:
+                    try:
+                        text = self.answer(line.decode('utf-8'))
+                    except UnicodeDecodeError:
+                        text = error_answer('request is not UTF-8')
+                if text == None:
+                    break
+                writer.write(text.encode('utf-8') + b'\n')
+                # Only waits when the client is slow to read
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections = self.connections - 1
+            writer.close()
+
+    async def serve(self, port=DEFAULT_PORT, path=None):
+        """
+            accept connections on 127.0.0.1:port, or the Unix socket path, until cancelled
+        """
+        if path != None:
+            server = await asyncio.start_unix_server(self.handle, path=path, limit=REQUEST_LIMIT)
+        else:
+            server = await asyncio.start_server(self.handle, '127.0.0.1', port, limit=REQUEST_LIMIT)
+        async with server:
+            await server.serve_forever()
+
+
+def usage():
+    print ('Usage: %s [-h] [-f FILE] [-s] [-c SIZE] [-p PORT | -u PATH]'%sys.argv[0])
+    print ('           -h       Show this message, and exit')
+    print ('           -f FILE  Set the file to FILE')
+    print ('           -s       Load FILE through its binary snapshot FILE.snap')
+    print ('           -c SIZE  Cache the answers to the last SIZE distinct queries')
+    print ('           -p PORT  Listen on 127.0.0.1:PORT, {} by default'.format(DEFAULT_PORT))
+    print ('           -u PATH  Listen on the Unix socket PATH instead')
+    print ('\n')
+    sys.exit(0)
+
+
+def command_line_arguments():
+    """
+        handle command_line_arguments, return filename, snapshot, cache size (0 for none), port
+        and Unix socket path
+    """
+    filename = 'data.txt'
+    snapshot = False
+    cache = 0
+    port = DEFAULT_PORT
+    path = None
+    args = sys.argv[1:]
+    while args:
+        arg = args.pop(0)
+        if arg == '-f' and args:
+            filename = args.pop(0)
+        elif arg == '-s':
+            snapshot = True
+        elif arg == '-c' and args:
+            cache = int(args.pop(0))
+        elif arg == '-p' and args:
+            port = int(args.pop(0))
+        elif arg == '-u' and args:
+            path = args.pop(0)
+        else:
+            usage()
+    return filename, snapshot, cache, port, path
+
+
+def main():
+    """
+        main function for tree_server.py
+    """
+    filename, snapshot, cache, port, path = command_line_arguments()
+    if not os.path.isfile(filename):
+        print ('File {} is not valid'.format(filename))
+        sys.exit(0)
+    # Load once, the interval and name search indexes are built up front for S and M queries
+    tree_structure = load_tree(filename, snapshot)
+    if cache:
+        tree_structure.enable_cache(cache)
+    shared = versioned_tree(tree_structure, intervals=True)
+    server = tree_server(shared)
+    if path != None:
+        print ('Serving {} on {}'.format(filename, path))
+    else:
+        print ('Serving {} on 127.0.0.1:{}'.format(filename, port))
+    sys.stdout.flush()
+    try:
+        asyncio.run(server.serve(port, path))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""
+    tree_snapshot.py
+
+    Notes:
+        Binary snapshot of a compact_tree (tree_compact.py), so a big tree can be reopened without
+        parsing the 'parent|child' text or resolving parents again.
+
+        The file is little endian, a header followed by 4 byte int arrays and the names:
+
+            magic        8 bytes, TREESNP2
+            header       node count, name count, names size in bytes, error count, messages size
+                         in bytes, 0
+            node_name    node count ints
+            parent_name  node count ints
+            parent       node count ints
+            depth        node count ints
+            first        name count ints
+            name_offsets name count + 1 ints, offsets of each name in the names bytes
+            error_lines  error count ints, the line numbers of the malformed lines
+            error_offsets error count + 1 ints, offsets of each message in the messages bytes
+            names        utf-8 names, back to back
+            messages     utf-8 error messages, back to back
+
+        The malformed lines skipped while parsing the text are kept, so a tree loaded from its
+        snapshot reports the same errors.
+
+        load() memory maps the file, the arrays are views of the mapped pages (so processes
+        opening the same snapshot share them) and names are decoded only when used. A tree
+        loaded this way is read only, use compact_tree.to_tree() for a tree that can change.
+"""
+
+# Standard library imports
+import sys
+import os
+import mmap
+import struct
+from array import array
+
+from tree_compact import compact_tree, ID_TYPE
+from tree_data import replaced_file
+
+
+MAGIC = b'TREESNP2'
+HEADER = struct.Struct('<IIIIII')
+# Bytes in one array entry
+ITEM_SIZE = 4
+# Arrays are views straight into the mapped pages when the platform byte order allows it, else copies
+MAPPED = hasattr(memoryview, 'cast') and sys.byteorder == 'little'
+
+
+class name_table(object):
+    def __init__(self, offsets, blob):
+        """
+            Read only name table over the names bytes, a name is decoded when it is looked up
+        """
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, name_id):
+        if name_id < 0:
+            name_id = name_id + len(self)
+        return bytes(self.blob[self.offsets[name_id]:self.offsets[name_id + 1]]).decode('utf-8')
+
+    def __iter__(self):
+        for name_id in range(len(self)):
+            yield self[name_id]
+
+
+def int_array(values):
+    """
+        return values as a little endian int array
+    """
+    ints = array(ID_TYPE, values)
+    if sys.byteorder != 'little':
+        ints.byteswap()
+    return ints
+
+
+def from_bytes(data):
+    """
+        return a native int array from little endian bytes
+    """
+    values = array(ID_TYPE)
+    # frombytes is Python 3, fromstring Python 2
+    if hasattr(values, 'frombytes'):
+        values.frombytes(data)
+    else:
+        values.fromstring(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def blob_offsets(encoded):
+    """
+        return the offsets of each of the encoded strings laid back to back, and the bytes
+    """
+    offsets = [0]
+    for text in encoded:
+        offsets.append(offsets[-1] + len(text))
+    return offsets, b''.join(encoded)
+
+
+def save(compact, file_name):
+    """
+        Write compact (a compact_tree) to the snapshot file_name
+        The snapshot is written to a temporary file first and renamed over file_name (see
+        tree_data.replaced_file), so readers never see half of it
+    """
+    # Encode the names and messages back to back and remember where each one starts
+    offsets, blob = blob_offsets([name.encode('utf-8') for name in compact.names])
+    error_offsets, messages = blob_offsets([message.encode('utf-8') for line_number, message in compact.errors])
+    error_lines = [line_number for line_number, message in compact.errors]
+    with replaced_file(file_name, 'wb') as filep:
+        filep.write(MAGIC)
+        filep.write(HEADER.pack(len(compact.node_name), len(offsets) - 1, len(blob), len(error_lines), len(messages), 0))
+        for values in (compact.node_name, compact.parent_name, compact.parent, compact.depth, compact.first, offsets, error_lines, error_offsets):
+            int_array(values).tofile(filep)
+        filep.write(blob)
+        filep.write(messages)
+
+
+def load(file_name):
+    """
+        Open the snapshot file_name, returns a read only compact_tree backed by the mapped file
+    """
+    with open(file_name, 'rb') as filep:
+        data = mmap.mmap(filep.fileno(), 0, access=mmap.ACCESS_READ)
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError('{} is not a tree snapshot'.format(file_name))
+    if len(data) < len(MAGIC) + HEADER.size:
+        raise ValueError('{} is truncated'.format(file_name))
+    node_count, name_count, names_size, error_count, messages_size, unused = HEADER.unpack_from(data, len(MAGIC))
+    if len(MAGIC) + HEADER.size + (4 * node_count + 2 * name_count + 2 * error_count + 2) * ITEM_SIZE + names_size + messages_size > len(data):
+        raise ValueError('{} is truncated'.format(file_name))
+    mapped = MAPPED
+    if mapped:
+        view = memoryview(data)
+    offset = len(MAGIC) + HEADER.size
+    arrays = []
+    for count in (node_count, node_count, node_count, node_count, name_count, name_count + 1):
+        end = offset + count * ITEM_SIZE
+        if mapped:
+            arrays.append(view[offset:end].cast(ID_TYPE))
+        else:
+            arrays.append(from_bytes(data[offset:end]))
+        offset = end
+    # The errors are few, read them straight away
+    error_lines = from_bytes(data[offset:offset + error_count * ITEM_SIZE])
+    offset = offset + error_count * ITEM_SIZE
+    error_offsets = from_bytes(data[offset:offset + (error_count + 1) * ITEM_SIZE])
+    offset = offset + (error_count + 1) * ITEM_SIZE
+    if mapped:
+        blob = view[offset:offset + names_size]
+    else:
+        blob = data[offset:offset + names_size]
+    offset = offset + names_size
+    messages = data[offset:offset + messages_size]
+    compact = compact_tree()
+    compact.node_name, compact.parent_name, compact.parent, compact.depth, compact.first, offsets = arrays
+    compact.names = name_table(offsets, blob)
+    compact.errors = [(error_lines[i], messages[error_offsets[i]:error_offsets[i + 1]].decode('utf-8')) for i in range(error_count)]
+    # Keep the mapping open for as long as the tree is
+    compact.mapping = data
+    return compact
+
+
+def snapshot_name(file_name):
+    """ the default snapshot file name for the text file file_name """
+    return file_name + '.snap'
+
+
+def load_tree(file_name, snapshot_file=None):
+    """
+        Load the 'parent|child' text file file_name through its snapshot, returns a compact_tree
+
+        The snapshot (file_name.snap unless snapshot_file is given) is used when it is at least as
+        new as the text, else (or when it can't be read, an older format included) the text is
+        parsed and the snapshot rebuilt from it
+    """
+    if snapshot_file == None:
+        snapshot_file = snapshot_name(file_name)
+    # Use the snapshot while it is up to date
+    if os.path.isfile(snapshot_file) and os.path.getmtime(snapshot_file) >= os.path.getmtime(file_name):
+        try:
+            return load(snapshot_file)
+        except ValueError:
+            pass
+    # Rebuild it from the text
+    compact = compact_tree()
+    compact.input_tree(file_name)
+    save(compact, snapshot_file)
+    return compact